@@ -0,0 +1,146 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from curves import DecayCurve, curve_panel
+from data_source import data_version, load_assets
+
+
+def _lightgbm():
+    from lightgbm import LGBMRegressor
+    # Same settings as the forecast in calculator copy.py. One thread, since the
+    # backtest already runs a worker process per core and times each fit's CPU.
+    return LGBMRegressor(n_estimators=50, learning_rate=0.1, num_leaves=10, min_child_samples=2, n_jobs=1, verbose=-1)
+
+
+def _linear():
+    from sklearn.linear_model import LinearRegression
+    return LinearRegression()
+
+
+# Candidate models by name; each entry builds a fresh estimator with fit/predict
+MODELS = {
+    "lightgbm": _lightgbm,
+    "linear": _linear,
+    "exponential": lambda: DecayCurve("exponential"),
+    "power": lambda: DecayCurve("power"),
+}
+
+
+# Rolling-origin evaluation of one product: train on every record before the
+# origin month, forecast the following `horizon` months and record the errors.
+# Origins are min_train months after the first record and then every `step`
+# months, counted in calendar months so gaps in the history are not skipped over.
+def backtest_series(t, price, models, horizon, min_train, step):
+    errors = []
+    timings = {name: [0.0, 0.0, 0] for name in models}
+    for origin in np.arange(t[0] + min_train, t[-1] + 1, step):
+        split = int(np.searchsorted(t, origin))
+        test = (t >= origin) & (t < origin + horizon)
+        if not test.any():
+            continue
+        X_train, y_train = t[:split, None], price[:split]
+        X_test, y_test = t[test, None], price[test]
+        steps = t[test] - origin + 1
+        for name in models:
+            start = time.process_time()
+            model = MODELS[name]().fit(X_train, y_train)
+            fitted = time.process_time()
+            predicted = model.predict(X_test)
+            done = time.process_time()
+            timings[name][0] += fitted - start
+            timings[name][1] += done - fitted
+            timings[name][2] += 1
+            for h, actual, forecast in zip(steps, y_test, predicted):
+                errors.append((name, int(origin), int(h), actual, forecast))
+    return errors, timings
+
+
+def _backtest_chunk(panel, models, horizon, min_train, step):
+    errors = []
+    timings = {name: [0.0, 0.0, 0] for name in models}
+    for product_id, series in panel.groupby("Product_ID", sort=False):
+        series = series.sort_values("t")
+        t = series["t"].to_numpy(dtype="float64")
+        price = np.exp(series["log_price"].to_numpy())
+        product_errors, product_timings = backtest_series(t, price, models, horizon, min_train, step)
+        errors += [(product_id,) + e for e in product_errors]
+        for name, (fit_s, predict_s, fits) in product_timings.items():
+            timings[name][0] += fit_s
+            timings[name][1] += predict_s
+            timings[name][2] += fits
+    return errors, timings
+
+
+# Runs the backtest for every product in `assets`, spread over worker processes.
+# Returns (per-forecast errors, per-model summary, per-horizon MAE and MAPE).
+def run_backtest(assets, models=tuple(MODELS), horizon=12, min_train=6, step=3, workers=None):
+    panel = curve_panel(assets)
+    product_ids = panel["Product_ID"].unique()
+    workers = workers or os.cpu_count() or 1
+    chunks = [panel[panel["Product_ID"].isin(ids)] for ids in np.array_split(product_ids, workers * 4) if len(ids)]
+
+    errors = []
+    timings = {name: [0.0, 0.0, 0] for name in models}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_backtest_chunk, chunk, models, horizon, min_train, step) for chunk in chunks]
+        for future in futures:
+            chunk_errors, chunk_timings = future.result()
+            errors += chunk_errors
+            for name, values in chunk_timings.items():
+                timings[name] = [total + value for total, value in zip(timings[name], values)]
+
+    errors = pd.DataFrame(errors, columns=["Product_ID", "Model", "Origin", "Horizon", "Actual", "Forecast"])
+    errors["Abs_Error"] = (errors["Forecast"] - errors["Actual"]).abs()
+    errors["APE_%"] = 100 * errors["Abs_Error"] / errors["Actual"]
+
+    by_horizon = errors.pivot_table(index="Horizon", columns="Model", values=["Abs_Error", "APE_%"], aggfunc="mean")
+    by_horizon = by_horizon.rename(columns={"Abs_Error": "MAE", "APE_%": "MAPE"}, level=0)
+
+    summary = errors.groupby("Model").agg(MAE=("Abs_Error", "mean"), MAPE=("APE_%", "mean"), Forecasts=("APE_%", "size"))
+    summary["Fits"] = [timings[name][2] for name in summary.index]
+    summary["Train_CPU_s"] = [timings[name][0] for name in summary.index]
+    summary["Predict_CPU_s"] = [timings[name][1] for name in summary.index]
+    summary["CPU_ms_per_fit"] = 1000 * (summary["Train_CPU_s"] + summary["Predict_CPU_s"]) / summary["Fits"]
+    return errors, summary.sort_values("MAPE"), by_horizon
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the price forecast models")
+    parser.add_argument("--models", nargs="+", choices=list(MODELS), default=list(MODELS))
+    parser.add_argument("--horizon", type=int, default=12, help="Months ahead to score")
+    parser.add_argument("--min-train", type=int, default=6, help="Months of history before the first origin")
+    parser.add_argument("--step", type=int, default=3, help="Months between forecast origins")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--main-group")
+    parser.add_argument("--sample", type=int, help="Only backtest this many random products")
+    parser.add_argument("--output", help="Write every scored forecast to this CSV")
+    args = parser.parse_args()
+
+    assets = load_assets(data_version())
+    if args.main_group:
+        assets = assets[assets["Main_Group"] == args.main_group]
+    if args.sample:
+        sample = pd.Series(assets["Product_ID"].unique()).sample(min(args.sample, assets["Product_ID"].nunique()), random_state=0)
+        assets = assets[assets["Product_ID"].isin(sample)]
+
+    start = time.time()
+    errors, summary, by_horizon = run_backtest(
+        assets, tuple(args.models), args.horizon, args.min_train, args.step, args.workers
+    )
+    print(f"Backtested {errors['Product_ID'].nunique()} products in {time.time() - start:.1f}s\n")
+    print(summary.round(3).to_string())
+    print("\nMAE (NOK) by horizon")
+    print(by_horizon["MAE"].round(2).to_string())
+    print("\nMAPE (%) by horizon")
+    print(by_horizon["MAPE"].round(2).to_string())
+    if args.output:
+        errors.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,16 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from datetime import datetime
+import os
 import time
 import numpy as np
 
 from lightgbm import LGBMRegressor
 from sklearn.linear_model import LinearRegression
 
+from curves import fit_curves, periods, predict_periods
+from forecast_models import MODEL_PATH, ForecastStore
+
 with st.spinner("Waking up the app, please wait..."):
     time.sleep(2)
 
@@ -57,6 +61,21 @@ def load_data():
 
 assets = load_data()
 
+
+# Exponential / power-law decay parameters for every product, fitted once per load
+@st.cache_data
+def load_curve_params(_assets):
+    return fit_curves(_assets)
+
+# Saved per-product LightGBM forecasts, kept current by `python forecast_models.py`.
+# Keyed on the file's mtime so a monthly refresh is picked up without a restart.
+@st.cache_resource(max_entries=1)
+def load_forecast_store(mtime):
+    return ForecastStore.load(MODEL_PATH)
+
+def forecast_store():
+    return load_forecast_store(os.path.getmtime(MODEL_PATH) if os.path.exists(MODEL_PATH) else None)
+
 st.sidebar.header(" Asset Filter")
 main_group = st.sidebar.selectbox("Main Group", sorted(assets['Main_Group'].dropna().unique()))
 subcategory_options = sorted(assets[assets["Main_Group"] == main_group]["Group_Name_x"].dropna().unique())
@@ -153,27 +172,52 @@ if st.button("Run Depreciation Forecast"):
             y_train = df["Current_Month_Price"]
             if df.shape[0] >= 10:
                 forecast = True
-                model = LGBMRegressor(
-                    n_estimators=50, learning_rate=0.1, num_leaves=10,
-                    min_data_in_leaf=2, min_child_samples=2
-                )
-                try:
-                    model.fit(X_train, y_train)
-                except Exception as e:
-                    st.warning("LightGBM failed, falling back to linear regression.")
-                    model = LinearRegression()
-                    model.fit(X_train, y_train)
-
                 last_month = df["Months_Since_Release"].max()
                 future_months = np.arange(last_month + 1, last_month + 13)
-                X_future = pd.DataFrame({"Months_Since_Release": future_months})
-                predicted_prices = model.predict(X_future)
+
+                # Saved models when the refresh job has trained every selected product
+                last_period = periods(df["Year"], df["Month"]).max()
+                predicted_prices = forecast_store().predict_periods(
+                    df["Product_ID"].unique(), np.arange(last_period + 1, last_period + 13)
+                )
+                if predicted_prices is None:
+                    model = LGBMRegressor(
+                        n_estimators=50, learning_rate=0.1, num_leaves=10,
+                        min_data_in_leaf=2, min_child_samples=2
+                    )
+                    try:
+                        model.fit(X_train, y_train)
+                    except Exception as e:
+                        st.warning("LightGBM failed, falling back to linear regression.")
+                        model = LinearRegression()
+                        model.fit(X_train, y_train)
+
+                    X_future = pd.DataFrame({"Months_Since_Release": future_months})
+                    predicted_prices = model.predict(X_future)
                 df_future = pd.DataFrame({
                     "Months_Since_Release": future_months,
                     "Predicted_Price": predicted_prices
                 })
                 df_future["Predicted_Depreciation_%"] = 100 * (orig_price - df_future["Predicted_Price"]) / orig_price
 
+            # --- Parametric Baseline (closed-form decay curves) ---
+            curve_params = load_curve_params(assets)
+            product_ids = df["Product_ID"][df["Product_ID"].isin(curve_params.index)].unique()
+            baseline = len(product_ids) > 0
+            if baseline:
+                last_period = periods(df["Year"], df["Month"]).max()
+                future_periods = np.arange(last_period + 1, last_period + 13)
+                baseline_prices = predict_periods(
+                    curve_params,
+                    np.repeat(product_ids, len(future_periods)),
+                    np.tile(future_periods, len(product_ids)),
+                ).reshape(len(product_ids), -1).mean(axis=0)
+                df_baseline = pd.DataFrame({
+                    "Months_Since_Release": future_periods - periods(release_date.year, release_date.month),
+                    "Baseline_Price": baseline_prices
+                })
+                df_baseline["Baseline_Depreciation_%"] = 100 * (orig_price - df_baseline["Baseline_Price"]) / orig_price
+
             # --- Scenario Calculation ---
             total_weight = risk_analysis_a + risk_analysis_b + risk_analysis_c + risk_analysis_d
             a = risk_analysis_a / total_weight
@@ -290,6 +334,14 @@ if st.button("Run Depreciation Forecast"):
                     name="Forecasted Price Drop",
                     line=dict(dash='dot')
                 )
+            if baseline:
+                fig_forecast.add_scatter(
+                    x=df_baseline["Months_Since_Release"],
+                    y=df_baseline["Baseline_Depreciation_%"],
+                    mode="lines",
+                    name="Parametric Baseline",
+                    line=dict(dash='dash')
+                )
             st.plotly_chart(fig_forecast)
 
     except ValueError:
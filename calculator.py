@@ -1,294 +1,412 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from datetime import datetime
 import time
+import io
+
+from cohorts import QUANTILES, cohort_curve
+from data_source import load_catalog, load_quarantine, new_releases
+from data_watch import DataWatcher
+from depreciation import SCENARIO_LABELS, SCENARIO_PLOT_LABELS
+from export import export_scenarios, select_scope
+from quotes import GRADE_MIX_PRESETS
+from validation import validation_summary
+from results_cache import scenario_results
+from warmup import record_request, start_warmup, warm_changed
+
+
+# Only the first run of a session shows the wake-up spinner
+if "app_started" not in st.session_state:
+    with st.spinner("Waking up the app, please wait..."):
+        time.sleep(2)
+    st.session_state["app_started"] = True
+
+# Number of scenario results memoized per session
+RESULTS_MEMO_SIZE = 20
+
+# Data file watcher, shared by every session. A new Data.xlsx is picked up in the
+# background and swapped in once its tables and indexes are ready.
+@st.cache_resource
+def data_watcher():
+    return DataWatcher(on_ready=warm_changed)
+
+
+@st.cache_data(max_entries=1)
+def load_new_releases(version):
+    return new_releases(load_catalog(version))
+
+
+# Rows held back by the load-time validation, summarized per reason code
+@st.cache_data(max_entries=1)
+def load_validation_summary(version):
+    return validation_summary(load_catalog(version), load_quarantine(version))
+
+
+try:
+    watcher = data_watcher()
+except ValueError as e:
+    st.error(str(e))
+    st.stop()
+
+# Every structure below comes from the snapshot live at the start of this run
+snapshot = watcher.current
+version = snapshot.version
+assets = snapshot.assets
+start_warmup(version, snapshot)
+
+
+# Fill the cascade from a search match; runs before the widgets are drawn again
+def apply_search_match():
+    match = st.session_state["search_match"]
+    if match is None:
+        return
+    entry = snapshot.search_index.entries.loc[match]
+    year = int(entry["Year_Available"])
+    st.session_state["main_group"] = entry["Main_Group"]
+    st.session_state["subcategory"] = entry["Group_Name_x"]
+    st.session_state["brand"] = entry["Brand_x"]
+    st.session_state["product"] = entry["Product_Name_x"]
+    st.session_state["start_year"] = min(st.session_state["start_year"], year)
+    st.session_state["end_year"] = max(st.session_state["end_year"], year)
+
+
+# === Sidebar (reruns on its own) ===
+@st.fragment
+def asset_filter():
+    st.header(" Asset Filter")
+
+    # Search across the whole catalog
+    st.session_state.setdefault("start_year", 2019)
+    st.session_state.setdefault("end_year", 2025)
+    query = st.text_input("Search Product", placeholder="e.g. iphone 13 pro")
+    if query:
+        search_index = snapshot.search_index
+        matches = search_index.search(query)
+        st.selectbox(
+            "Matches",
+            list(matches.index),
+            index=None,
+            key="search_match",
+            format_func=lambda i: "{} – {} ({}, {:.0f})".format(*search_index.entries.loc[i, ["Product_Name_x", "Brand_x", "Group_Name_x", "Year_Available"]]),
+            on_change=apply_search_match,
+            placeholder=f"{len(matches)} matching products" if len(matches) else "No matching products",
+        )
+
+    main_group = st.selectbox("Main Group", sorted(assets['Main_Group'].dropna().unique()), key="main_group")
+
+    # Subcategory (with 'All' option)
+    subcategory_options = sorted(assets[assets["Main_Group"] == main_group]["Group_Name_x"].dropna().unique())
+    subcategory_options = ["All"] + subcategory_options
+    group = st.selectbox("Subcategory", subcategory_options, key="subcategory")
+
+    # Filter by Main Group and optionally Subcategory
+    if group != "All":
+        group_filtered_assets = assets[assets["Group_Name_x"] == group]
+    else:
+        group_filtered_assets = assets[assets["Main_Group"] == main_group]
 
+    # Brand dropdown even if Subcategory is 'All'
+    brand_options = sorted(group_filtered_assets["Brand_x"].dropna().unique())
+    brand = st.selectbox("Brand", brand_options, key="brand")
 
-with st.spinner("Waking up the app, please wait..."):
-    time.sleep(2)
-
-#Data loading function
-@st.cache_data
-def load_data():
-    df = pd.read_excel("Data.xlsx")
-    df.columns = df.columns.str.strip()
-
-    # Drop unused columns if they exist
-    columns_to_drop = ["Previous_Month_Price", "Price_Change", "Fact_ID"]
-    df = df.drop(columns=[col for col in columns_to_drop if col in df.columns], errors="ignore")
-
-    # Rename to match expected names
-    df.rename(columns={
-        "Group_Name": "Group_Name_x",
-        "Brand": "Brand_x",
-        "Product_Name": "Product_Name_x",
-        "Year Available": "Year_Available"
-    }, inplace=True)
-
-    # Ensure required columns are present
-    required_cols = ["Group_Name_x", "Brand_x", "Product_ID"]
-    missing = [col for col in required_cols if col not in df.columns]
-    if missing:
-        st.error(f"Missing required columns in Data.xlsx: {missing}")
-        st.stop()
-
-    # Filter unwanted and rare products
-    df = df[df["Group_Name_x"] != "APPLE_BB"]
-    df = df[df["Product_ID"].isin(df["Product_ID"].value_counts()[lambda x: x > 2].index)]
-
-    #  Ensure proper indentation here:
-    def map_main_group(name):
-        if isinstance(name, str):
-            name_upper = name.upper()
-            if name_upper.startswith("PC_"):
-                return "PC"
-            elif name_upper.startswith("BB_"):
-                return "BB"
-            elif "SMARTPHONE" in name_upper:
-                return "SMARTPHONE"
-            elif "TABLET" in name_upper:
-                return "TABLET"
-            elif "LAPTOP" in name_upper:
-                return "Laptop"
-            else:
-                return name.split()[0]
-        return name
-
-    df["Main_Group"] = df["Group_Name_x"].apply(map_main_group)
-    return df
+    # Filter by Brand
+    filtered_assets = group_filtered_assets[group_filtered_assets["Brand_x"] == brand]
 
+    # Filter by year
+    start_year = st.number_input("Start Year", min_value=2000, max_value=2100, key="start_year")
+    end_year = st.number_input("End Year", min_value=2000, max_value=2100, key="end_year")
+    filtered_assets = filtered_assets[filtered_assets['Year_Available'].between(start_year, end_year)]
 
-assets = load_data()
+    # Product dropdown comes first
+    product_options = sorted(filtered_assets["Product_Name_x"].dropna().unique())
+    product = st.selectbox("Product", product_options, key="product") if product_options else None
 
+    # Narrow to selected product
+    if product:
+        matching_assets = filtered_assets[filtered_assets["Product_Name_x"] == product]
+    else:
+        matching_assets = pd.DataFrame()
+
+    # Optional specification filters after product selection
+    screen = class_ = generation = 'All'
+    if not matching_assets.empty and main_group in ["SMARTPHONE", "TABLET", "PC", "BB", "Laptop"]:
+        screen_options = matching_assets['Screen_Size'].dropna().unique()
+        if len(screen_options) > 0:
+            screen = st.selectbox("Screen Size (Optional)", ['All'] + sorted(screen_options))
+
+        class_options = matching_assets['Class'].dropna().unique()
+        if len(class_options) > 0:
+            class_ = st.selectbox("Class (Optional)", ['All'] + sorted(class_options))
+
+        gen_options = matching_assets['Gen'].dropna().unique()
+        if len(gen_options) > 0:
+            generation = st.selectbox("Generation (Optional)", ['All'] + sorted(gen_options))
+
+        storage_options = matching_assets['Storage'].dropna().unique()
+        if len(storage_options) > 0:
+            storage = st.selectbox("Storage", ['All'] + sorted(storage_options))
+        else:
+            storage = 'N/A'
+    else:
+        storage = 'N/A'
 
+    # Apply filters to matching_assets
+    if screen != "All":
+        matching_assets = matching_assets[matching_assets["Screen_Size"] == screen]
+    if class_ != "All":
+        matching_assets = matching_assets[matching_assets["Class"] == class_]
+    if generation != "All":
+        matching_assets = matching_assets[matching_assets["Gen"] == generation]
+    if storage != "All" and storage != "N/A":
+        matching_assets = matching_assets[matching_assets["Storage"] == storage]
 
-st.sidebar.header(" Asset Filter")
+    # Publish the selection; the main section only needs a full rerun when it changed
+    selection = (main_group, group, brand, start_year, end_year, product, screen, class_, generation, storage)
+    previous = st.session_state.get("selection")
+    st.session_state["selection"] = selection
+    st.session_state["matching_assets"] = matching_assets
+    if previous is not None and previous != selection:
+        st.rerun()
 
-main_group = st.sidebar.selectbox("Main Group", sorted(assets['Main_Group'].dropna().unique()))
 
-# Subcategory (with 'All' option)
-subcategory_options = sorted(assets[assets["Main_Group"] == main_group]["Group_Name_x"].dropna().unique())
-subcategory_options = ["All"] + subcategory_options
-group = st.sidebar.selectbox("Subcategory", subcategory_options)
+with st.sidebar:
+    asset_filter()
 
-# Filter by Main Group and optionally Subcategory
-if group != "All":
-    group_filtered_assets = assets[assets["Group_Name_x"] == group]
-else:
-    group_filtered_assets = assets[assets["Main_Group"] == main_group]
 
-# Brand dropdown even if Subcategory is 'All'
-brand_options = sorted(group_filtered_assets["Brand_x"].dropna().unique())
-brand = st.sidebar.selectbox("Brand", brand_options)
+# === Main Section ===
+st.title(" Long Term Asset Depreciation")
 
-# Filter by Brand
-filtered_assets = group_filtered_assets[group_filtered_assets["Brand_x"] == brand]
 
-# Filter by year
-start_year = st.sidebar.number_input("Start Year", min_value=2000, max_value=2100, value=2019)
-end_year = st.sidebar.number_input("End Year", min_value=2000, max_value=2100, value=2025)
-filtered_assets = filtered_assets[filtered_assets['Year_Available'].between(start_year, end_year)]
+# Scenario inputs rerun on their own and only redraw the results below them
+@st.fragment
+def scenario_inputs():
+    orig_price = st.number_input("Original Price (NOK)", value=10000.0)
+    release_date_str = st.text_input("Release Date (YYYY-MM)", value="2021-01")
 
-# Product dropdown comes first
-product_options = sorted(filtered_assets["Product_Name_x"].dropna().unique())
-product = st.sidebar.selectbox("Product", product_options) if product_options else None
+    # Risk Analysis Inputs
+    st.subheader(" Historical Customer Category Returns")
+    risk_analysis_a = st.number_input("Grade A %", value=0.25)
+    risk_analysis_b = st.number_input("Grade B %", value=0.25)
+    risk_analysis_c = st.number_input("Grade C %", value=0.25)
+    risk_analysis_d = st.number_input("Grade D %", value=0.25)
 
-# Narrow to selected product
-if product:
-    matching_assets = filtered_assets[filtered_assets["Product_Name_x"] == product]
-else:
-    matching_assets = pd.DataFrame()
+    weights = (risk_analysis_a, risk_analysis_b, risk_analysis_c, risk_analysis_d)
+    st.session_state["weights"] = weights
 
-# Optional specification filters after product selection
-screen = class_ = generation = 'All'
-if not matching_assets.empty and main_group in ["SMARTPHONE", "TABLET", "PC", "BB", "Laptop"]:
-    screen_options = matching_assets['Screen_Size'].dropna().unique()
-    if len(screen_options) > 0:
-        screen = st.sidebar.selectbox("Screen Size (Optional)", ['All'] + sorted(screen_options))
+    # Results stay visible across later interactions once requested
+    if st.button("Run Depreciation Forecast"):
+        st.session_state["forecast_requested"] = True
+    if not st.session_state.get("forecast_requested"):
+        return
 
-    class_options = matching_assets['Class'].dropna().unique()
-    if len(class_options) > 0:
-        class_ = st.sidebar.selectbox("Class (Optional)", ['All'] + sorted(class_options))
+    results(orig_price, release_date_str, weights)
 
-    gen_options = matching_assets['Gen'].dropna().unique()
-    if len(gen_options) > 0:
-        generation = st.sidebar.selectbox("Generation (Optional)", ['All'] + sorted(gen_options))
 
-    storage_options = matching_assets['Storage'].dropna().unique()
-    if len(storage_options) > 0:
-        storage = st.sidebar.selectbox("Storage", ['All'] + sorted(storage_options))
-    else:
-        storage = 'N/A'
-else:
-    storage = 'N/A'
-
-# Apply filters to matching_assets
-if screen != "All":
-    matching_assets = matching_assets[matching_assets["Screen_Size"] == screen]
-if class_ != "All":
-    matching_assets = matching_assets[matching_assets["Class"] == class_]
-if generation != "All":
-    matching_assets = matching_assets[matching_assets["Gen"] == generation]
-if storage != "All" and storage != "N/A":
-    matching_assets = matching_assets[matching_assets["Storage"] == storage]
+# Scenario results memoized in session state, keyed by their exact inputs
+def session_results(orig_price, release_date_str, weights):
+    key = (version, st.session_state["selection"], orig_price, release_date_str, weights)
+    memo = st.session_state.setdefault("results", {})
+    if key in memo:
+        return memo[key]
 
-# === Main Section ===
-st.title(" Long Term Asset Depreciation")
+    matching_assets = st.session_state["matching_assets"]
+    record_request(st.session_state["selection"][5])
+    df = scenario_results(snapshot.rows_key(matching_assets.index), orig_price, release_date_str, weights, matching_assets)
 
-orig_price = st.number_input("Original Price (NOK)", value=10000.0)
-release_date_str = st.text_input("Release Date (YYYY-MM)", value="2021-01")
+    memo[key] = df
+    while len(memo) > RESULTS_MEMO_SIZE:
+        memo.pop(next(iter(memo)))
+    return df
 
-# Risk Analysis Inputs
-st.subheader(" Historical Customer Category Returns")
-risk_analysis_a = st.number_input("Grade A %", value=0.25)
-risk_analysis_b = st.number_input("Grade B %", value=0.25)
-risk_analysis_c = st.number_input("Grade C %", value=0.25)
-risk_analysis_d = st.number_input("Grade D %", value=0.25)
 
-if st.button("Run Depreciation Forecast"):
-    
+@st.fragment
+def results(orig_price, release_date_str, weights):
     try:
-
-    
-        release_date = datetime.strptime(release_date_str, "%Y-%m")
-        df = matching_assets.copy()
-        if storage != "N/A":
-            df = df[df["Storage"] == storage]
-
-        df["Date"] = pd.to_datetime(df[["Year", "Month"]].assign(DAY=1))
-        df = df[df["Date"] >= release_date].sort_values("Date")
-
-        if df.empty:
-            st.warning("⚠️ No records after selected release date.")
-        else:
-            df["Original_Price"] = orig_price
-            df["Depreciation_NOK"] = orig_price - df["Current_Month_Price"]
-            df["Depreciation_%"] = 100 * df["Depreciation_NOK"] / orig_price
-            df["Months_Since_Release"] = (
-                (df["Date"].dt.year - release_date.year) * 12 +
-                (df["Date"].dt.month - release_date.month)
-            )
-
-            # Normalize weights
-            total_weight = risk_analysis_a + risk_analysis_b + risk_analysis_c + risk_analysis_d
-            a = risk_analysis_a / total_weight
-            b = risk_analysis_b / total_weight
-            c = risk_analysis_c / total_weight
-            d = risk_analysis_d / total_weight
-
-            # Scenario multipliers
-            a_factor = 0.90
-            b_factor = 0.75
-            c_factor = 0.60
-            d_factor = 0.0
-
-            # Expected Case
-            df["Expected_Residual"] = df["Current_Month_Price"] * (a * a_factor + b * b_factor + c * c_factor + d * d_factor)
-
-            # Best Case  or Full Damage Billing
-            a_b = a + 0.1
-            b_b = b + 0.05
-            c_b = max(c - 0.075, 0)
-            d_b = max(d - 0.075, 0)
-            total_b = a_b + b_b + c_b + d_b
-            a_b /= total_b
-            b_b /= total_b
-            c_b /= total_b
-            d_b /= total_b
-            df["Best_Case"] = df["Current_Month_Price"] * (a_b * a_factor + b_b * b_factor + c_b * c_factor + d_b * d_factor)
-
-            # Worst Case (favor C/D more)
-            a_w = max(a - 0.075, 0)
-            b_w = max(b - 0.075, 0)
-            c_w = c + 0.05
-            d_w = d + 0.1
-            total_w = a_w + b_w + c_w + d_w
-            a_w /= total_w
-            b_w /= total_w
-            c_w /= total_w
-            d_w /= total_w
-            df["Worst_Case"] = df["Current_Month_Price"] * (a_w * a_factor + b_w * b_factor + c_w * c_factor + d_w * d_factor)
-            # Medium Damage Billing (Customer pays only for C and D)
-
-            c_d_total = c + d
-            c_adj = c / c_d_total
-            d_adj = d / c_d_total
-            df["Medium_Damage_Billing"] = df["Current_Month_Price"] * (c_adj * c_factor + d_adj * d_factor)
-            df["Medium_%"] = 100 * df["Medium_Damage_Billing"] / orig_price
-
-            grade_factors = {'A': 0.90, 'B': 0.75, 'C': 0.60, 'D': 0.00}
-            expected = (a * grade_factors['A'] + b * grade_factors['B'] + c * grade_factors['C'] + d * grade_factors['D'])
-            # No Damage Billing (customer pays nothing, company absorbs all risk)
-            # Use conservative approach — e.g., 20–30% below Expected Residual
-            no_damage_factor = expected * 0.85  # Example: reduce residual value to account for risk
-            df["No_Damage_Billing"] = df["Current_Month_Price"] * no_damage_factor
-
-            # D-only Billing (Customer pays only for Grade D)
-            df["D_Only_Billing"] = df["Current_Month_Price"] * (a + b + c)
-            df["D_Only_%"] = 100 * df["D_Only_Billing"] / orig_price
-
-
-        
-            # Residual Percent
-            df["Expected_%"] = 100 * (df["Expected_Residual"] / orig_price)
-            df["Best_%"] = 100 * (df["Best_Case"] / orig_price)
-            df["Worst_%"] = 100 * (df["Worst_Case"] / orig_price)
-            df["No_Damage_%"] = 100 * (df["No_Damage_Billing"] / orig_price)
-            df["Medium_%"] = 100 * (df["Medium_Damage_Billing"] / orig_price)
-
-            st.subheader(" Depreciation Table")
-            df["Year-Month"] = df["Date"].dt.strftime("%Y-%m")
-            depreciation_table = df[["Year-Month", "Months_Since_Release", "Current_Month_Price", "Depreciation_%", "Depreciation_NOK"]].round(2)
-            st.dataframe(depreciation_table)
-
-            st.subheader(" Residual Scenarios Table")
-            scenario_df = df[[
-                "Months_Since_Release",
-                "Expected_%",
-                "Best_%",
-                "Medium_%", 
-                "No_Damage_%",
-                "D_Only_%",
-                
-            ]].rename(columns={
-                "Expected_%": "Expected Case (Weighted A–D)",
-                "Medium_%": "Medium Damage Billing",
-                "Best_%": "Full Damage Billing",
-                "No_Damage_%": "No Damage Billing",
-                "D_Only_%": "D-Only Billing"
-            }).round(2)
-            st.dataframe(scenario_df)
-            # Rename residual scenario columns for friendly legend labels
-            df_plot = df.rename(columns={
-                "Expected_%": "Expected Case",
-                "Best_%": "Full Damage",
-                "Medium_%": "Medium Damage",
-                "No_Damage_%": "No Damage"
-            })
-
-            # Scenario Forecasts Graph
-            fig_forecast = px.line(
-                df_plot,
-                x="Months_Since_Release",
-                y=["Expected Case", "Full Damage", "Medium Damage", "No Damage"],
-                title="📈 Residual Forecasts by Billing Agreement Type",
-                markers=True,
-                labels={
-                    "Months_Since_Release": "Months Since Release",
-                    "value": "Residual Value (%)",
-                    "variable": "Scenario"
-                }
-            )
-            fig_forecast.update_layout(
-                xaxis_title="Months Since Release",
-                yaxis_title="Residual Value (%)",
-                legend_title="Scenario"
-            )
-            st.plotly_chart(fig_forecast)
-
+        df = session_results(orig_price, release_date_str, weights)
     except ValueError:
         st.error(" Invalid date format. Please use YYYY-MM.")
-
-
-
+        return
+
+    if df.empty:
+        st.warning("⚠️ No records after selected release date.")
+        return
+
+    st.subheader(" Depreciation Table")
+    depreciation_table = df[["Year-Month", "Months_Since_Release", "Current_Month_Price", "Depreciation_%", "Depreciation_NOK"]].round(2)
+    st.dataframe(depreciation_table)
+
+    st.subheader(" Residual Scenarios Table")
+    scenario_df = df[["Months_Since_Release"] + list(SCENARIO_LABELS)].rename(columns=SCENARIO_LABELS).round(2)
+    st.dataframe(scenario_df)
+    # Rename residual scenario columns for friendly legend labels
+    df_plot = df.rename(columns=SCENARIO_PLOT_LABELS)
+
+    # Scenario Forecasts Graph
+    fig_forecast = px.line(
+        df_plot,
+        x="Months_Since_Release",
+        y=list(SCENARIO_PLOT_LABELS.values()),
+        title="📈 Residual Forecasts by Billing Agreement Type",
+        markers=True,
+        labels={
+            "Months_Since_Release": "Months Since Release",
+            "value": "Residual Value (%)",
+            "variable": "Scenario"
+        }
+    )
+    fig_forecast.update_layout(
+        xaxis_title="Months Since Release",
+        yaxis_title="Residual Value (%)",
+        legend_title="Scenario"
+    )
+    st.plotly_chart(fig_forecast)
+
+
+scenario_inputs()
+
+
+# === Bulk Export ===
+@st.fragment
+def bulk_export():
+    with st.expander(" Bulk Export"):
+        main_group, _, brand = st.session_state["selection"][:3]
+        scopes = {
+            f"Main Group: {main_group}": {"main_group": main_group},
+            f"Brand: {brand} ({main_group})": {"main_group": main_group, "brand": brand},
+            "Whole catalog": {},
+        }
+        scope = st.selectbox("Scope", list(scopes))
+        fmt = st.radio("Format", ["xlsx", "parquet"], horizontal=True)
+
+        if st.button("Prepare Export"):
+            buffer = io.BytesIO()
+            weights = st.session_state.get("weights", (0.25, 0.25, 0.25, 0.25))
+            with st.spinner("Exporting residual tables..."):
+                export_scenarios(select_scope(assets, **scopes[scope]), buffer, fmt, weights)
+            parts = list(scopes[scope].values()) or ["catalog"]
+            file_name = "residuals_" + "_".join(parts).replace(" ", "_") + f".{fmt}"
+            st.session_state["export"] = (file_name, buffer.getvalue())
+
+        if "export" in st.session_state:
+            file_name, data = st.session_state["export"]
+            st.download_button(f"Download {file_name}", data, file_name=file_name)
+
+
+bulk_export()
+
+
+# === Quick Quote ===
+# Standard grade mixes are a lookup in the materialized quote table
+@st.fragment
+def quick_quote():
+    with st.expander(" Quick Quote"):
+        matching_assets = st.session_state["matching_assets"]
+        if matching_assets.empty:
+            st.info("Select a product to quote.")
+            return
+
+        quote_table = snapshot.quote_table
+        product_id = st.selectbox("Product ID", sorted(matching_assets["Product_ID"].unique()))
+        months = st.select_slider(
+            "Months Since First Listing",
+            options=list(quote_table.table.loc[product_id].index),
+        )
+        custom = "Custom (grade inputs above)"
+        preset = st.selectbox("Grade Mix", list(GRADE_MIX_PRESETS) + [custom])
+        if preset == custom:
+            residuals = quote_table.quote(product_id, months, preset, weights=st.session_state.get("weights"))
+        else:
+            residuals = quote_table.quote(product_id, months, preset)
+
+        st.dataframe(
+            pd.DataFrame({"Residual Value (% of first listed price)": residuals}).round(2)
+        )
+
+
+quick_quote()
+
+
+# === New Releases ===
+# Products with too short a history get the blended curve of their closest established peers
+@st.fragment
+def new_release_lookup():
+    with st.expander(" New Releases (Similar Products)"):
+        releases = load_new_releases(version)
+        main_group = st.session_state["selection"][0]
+        releases = releases[releases["Main_Group"] == main_group]
+        release_options = sorted(releases["Product_Name_x"].dropna().unique())
+        if not release_options:
+            st.info("No new releases in this Main Group.")
+            return
+
+        release = st.selectbox("New Release", release_options)
+        k = st.slider("Similar Products", min_value=1, max_value=20, value=5)
+
+        rows = releases[releases["Product_Name_x"] == release]
+        rows = rows[rows["Product_ID"] == rows["Product_ID"].iloc[0]]
+        index = snapshot.neighbour_index
+        neighbours = index.query(rows, k)
+        launch_price = rows.sort_values(["Year", "Month"])["Current_Month_Price"].iloc[0]
+        curve = index.blended_curve(neighbours, launch_price)
+
+        st.dataframe(neighbours.drop(columns="Row").round(3))
+        fig_release = px.line(
+            curve,
+            x="Months_Since_Release",
+            y="Retention_%",
+            title=f"Blended Depreciation Curve for {release}",
+            markers=True,
+            labels={"Months_Since_Release": "Months Since Release", "Retention_%": "Value Retained (%)"}
+        )
+        st.plotly_chart(fig_release)
+
+
+new_release_lookup()
+
+
+# === Market Curves ===
+# Generic curve for a cohort, e.g. every Samsung smartphone; a lookup in the precomputed table
+@st.fragment
+def cohort_view():
+    with st.expander(" Market Curves (Cohorts)"):
+        main_group, group, brand = st.session_state["selection"][:3]
+        cohorts = {f"Main Group: {main_group}": (main_group, "All", "All")}
+        if group != "All":
+            cohorts[f"Subcategory: {group}"] = (main_group, group, "All")
+            cohorts[f"Brand in Subcategory: {brand} / {group}"] = (main_group, group, brand)
+        cohorts[f"Brand: {brand} ({main_group})"] = (main_group, "All", brand)
+        cohort = st.selectbox("Cohort", list(cohorts))
+        min_products = st.slider("Minimum Products per Month", min_value=1, max_value=50, value=5)
+
+        curve = cohort_curve(snapshot.cohorts, *cohorts[cohort], min_products=min_products)
+        if curve.empty:
+            st.info("Not enough products in this cohort.")
+            return
+
+        fig_cohort = px.line(
+            curve.reset_index(),
+            x="Months_Since_Release",
+            y=list(QUANTILES),
+            title=f"Market Depreciation Curve – {cohort}",
+            labels={
+                "Months_Since_Release": "Months Since First Listing",
+                "value": "Value Retained (%)",
+                "variable": "Quantile"
+            }
+        )
+        st.plotly_chart(fig_cohort)
+        st.dataframe(curve.round(2))
+
+
+cohort_view()
+
+
+# === Data Quality ===
+with st.expander(" Data Quality"):
+    quarantine = load_quarantine(version)
+    st.caption(f"{len(quarantine)} rows quarantined at load time and left out of every table and forecast.")
+    if watcher.error is not None:
+        st.warning(f"The latest data file could not be loaded, still serving version {version}: {watcher.error}")
+    st.dataframe(load_validation_summary(version).round(2))
+    if not quarantine.empty:
+        st.dataframe(quarantine.head(200))
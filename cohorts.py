@@ -0,0 +1,49 @@
+import pandas as pd
+
+from quotes import price_ratios
+
+
+# Cohort levels, from the broadest down. Levels a cohort does not narrow by hold "All",
+# the same placeholder the sidebar uses.
+COHORT_LEVELS = ["Main_Group", "Group_Name_x", "Brand_x"]
+COHORT_ROLLUPS = [
+    ("Main_Group",),
+    ("Main_Group", "Group_Name_x"),
+    ("Main_Group", "Brand_x"),
+    ("Main_Group", "Group_Name_x", "Brand_x"),
+]
+QUANTILES = {"P10": 0.10, "P25": 0.25, "Median": 0.50, "P75": 0.75, "P90": 0.90}
+CURVE_COLUMNS = ["Products"] + list(QUANTILES)
+
+
+# Median and quantile retention (percent of first listed price) by months since each
+# product's first appearance, for every cohort in COHORT_ROLLUPS. The rollups are
+# stacked into one long frame so the whole table is a single groupby pass.
+def cohort_curves(assets):
+    ratios = price_ratios(assets).rename("Retention_%").reset_index()
+    attributes = assets.groupby("Product_ID")[COHORT_LEVELS].first()
+    panel = ratios.join(attributes, on="Product_ID").dropna(subset=["Main_Group"])
+
+    stacked = []
+    for levels in COHORT_ROLLUPS:
+        rollup = panel.copy()
+        for level in COHORT_LEVELS:
+            if level not in levels:
+                rollup[level] = "All"
+        stacked.append(rollup)
+    stacked = pd.concat(stacked, ignore_index=True)
+
+    groups = stacked.groupby(COHORT_LEVELS + ["Months_Since_Release"], sort=True)["Retention_%"]
+    curves = groups.quantile(list(QUANTILES.values())).unstack()
+    curves.columns = list(QUANTILES)
+    curves.insert(0, "Products", groups.size())
+    return curves.astype({"Products": "int32"})
+
+
+# One cohort's curve; group and brand default to "All"
+def cohort_curve(curves, main_group, group="All", brand="All", min_products=1):
+    try:
+        curve = curves.loc[(main_group, group, brand)]
+    except KeyError:
+        return pd.DataFrame(columns=CURVE_COLUMNS)
+    return curve[curve["Products"] >= min_products]
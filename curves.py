@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+
+# Closed-form decay curves fitted in log space for every product at once:
+#   exponential  price = exp(a + b * t)
+#   power law    price = exp(a) * (1 + t) ** b
+# where t is months since the product's first observed month.
+CURVE_MODELS = {
+    "exponential": lambda t: t,
+    "power": np.log1p,
+}
+
+
+# Month number (year * 12 + month) used to align products on the calendar
+def periods(year, month):
+    return np.asarray(year, dtype="int64") * 12 + np.asarray(month, dtype="int64") - 1
+
+
+def curve_panel(assets):
+    df = assets[["Product_ID", "Year", "Month", "Current_Month_Price"]].dropna()
+    df = df[df["Current_Month_Price"] > 0]
+    period = periods(df["Year"], df["Month"])
+    first_period = pd.Series(period, index=df.index).groupby(df["Product_ID"]).transform("min")
+    return pd.DataFrame({
+        "Product_ID": df["Product_ID"].to_numpy(),
+        "t": period - first_period.to_numpy(),
+        "log_price": np.log(df["Current_Month_Price"].to_numpy()),
+        "period": period,
+    })
+
+
+# Least squares slope and intercept of y on x per product from grouped sums.
+# Products whose x never varies get a flat curve at their mean.
+def _grouped_fit(ids, x, y):
+    sums = pd.DataFrame({"n": 1.0, "x": x, "y": y, "xx": x * x, "xy": x * y}).groupby(ids, sort=True).sum()
+    denom = sums["n"] * sums["xx"] - sums["x"] ** 2
+    slope = np.where(denom > 1e-12, (sums["n"] * sums["xy"] - sums["x"] * sums["y"]) / denom.where(denom > 1e-12, 1), 0.0)
+    intercept = (sums["y"] - slope * sums["x"]) / sums["n"]
+    return intercept, pd.Series(slope, index=sums.index)
+
+
+# One row of curve parameters per Product_ID, with the in-sample error of each
+# model and the better of the two in "best"
+def fit_curves(assets):
+    panel = curve_panel(assets)
+    ids = panel["Product_ID"]
+    params = panel.groupby("Product_ID", sort=True).agg(
+        n=("t", "size"), first_period=("period", "min"), last_t=("t", "max"),
+    )
+
+    price = np.exp(panel["log_price"])
+    for name, transform in CURVE_MODELS.items():
+        x = transform(panel["t"].to_numpy(dtype="float64"))
+        intercept, slope = _grouped_fit(ids, x, panel["log_price"].to_numpy())
+        params[f"{name}_a"] = intercept
+        params[f"{name}_b"] = slope
+        fitted = np.exp(intercept.reindex(ids).to_numpy() + slope.reindex(ids).to_numpy() * x)
+        params[f"{name}_mape"] = (np.abs(fitted - price) / price).groupby(ids).mean()
+
+    errors = params[[f"{name}_mape" for name in CURVE_MODELS]].to_numpy()
+    params["best"] = np.array(list(CURVE_MODELS))[errors.argmin(axis=1)]
+    return params
+
+
+# Predicted prices for aligned arrays of product ids and months since first
+# observation. model is a name from CURVE_MODELS or "best".
+def predict_curves(params, product_ids, t, model="best"):
+    rows = params.loc[np.asarray(product_ids)]
+    t = np.asarray(t, dtype="float64")
+    prediction = np.full(len(rows), np.nan)
+    for name, transform in CURVE_MODELS.items():
+        mask = (rows["best"].to_numpy() == name) if model == "best" else np.full(len(rows), model == name)
+        prediction[mask] = np.exp(rows[f"{name}_a"].to_numpy()[mask] + rows[f"{name}_b"].to_numpy()[mask] * transform(t[mask]))
+    return prediction
+
+
+# Same as predict_curves but addressed by calendar period (see periods())
+def predict_periods(params, product_ids, period, model="best"):
+    t = np.asarray(period) - params.loc[np.asarray(product_ids), "first_period"].to_numpy()
+    return predict_curves(params, product_ids, t, model)
+
+
+# Single-series version with the fit/predict interface of the sklearn models,
+# so the curves can be compared against them on equal terms
+class DecayCurve:
+    def __init__(self, model="exponential"):
+        self.model = model
+
+    def fit(self, X, y):
+        x = CURVE_MODELS[self.model](np.asarray(X, dtype="float64").ravel())
+        log_y = np.log(np.clip(np.asarray(y, dtype="float64"), 1e-9, None))
+        if np.ptp(x) > 0:
+            self.b_, self.a_ = np.polyfit(x, log_y, 1)
+        else:
+            self.b_, self.a_ = 0.0, log_y.mean()
+        return self
+
+    def predict(self, X):
+        x = CURVE_MODELS[self.model](np.asarray(X, dtype="float64").ravel())
+        return np.exp(self.a_ + self.b_ * x)
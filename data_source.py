@@ -0,0 +1,118 @@
+import hashlib
+import os
+from functools import lru_cache
+
+import pandas as pd
+
+from cohorts import cohort_curves
+from disk_cache import cached, content_key
+from validation import validate
+
+
+DATA_PATH = "Data.xlsx"
+# Part of every cache key for the cleaned tables and scenario results; bump when
+# their layout or the scenario computation changes
+SCHEMA_VERSION = 3
+
+
+@lru_cache(maxsize=8)
+def _content_hash(path, stamp):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+# Content hash of the data file, used to key every cache built from it. The file
+# is only re-hashed when its mtime or size changes.
+def data_version(path=DATA_PATH):
+    stat = os.stat(path)
+    return _content_hash(path, (stat.st_mtime_ns, stat.st_size))
+
+
+def map_main_group(name):
+    if isinstance(name, str):
+        name_upper = name.upper()
+        if name_upper.startswith("PC_"):
+            return "PC"
+        elif name_upper.startswith("BB_"):
+            return "BB"
+        elif "SMARTPHONE" in name_upper:
+            return "SMARTPHONE"
+        elif "TABLET" in name_upper:
+            return "TABLET"
+        elif "LAPTOP" in name_upper:
+            return "Laptop"
+        else:
+            return name.split()[0]
+    return name
+
+
+# Products need more than this many monthly records to get a curve of their own
+MIN_HISTORY = 2
+
+
+# Read and clean every product in the data file, including new releases with a
+# short history. Raises ValueError when required columns are missing.
+def read_catalog(path=DATA_PATH):
+    df = pd.read_excel(path)
+    df.columns = df.columns.str.strip()
+
+    # Drop unused columns if they exist
+    columns_to_drop = ["Previous_Month_Price", "Price_Change", "Fact_ID"]
+    df = df.drop(columns=[col for col in columns_to_drop if col in df.columns], errors="ignore")
+
+    # Rename to match expected names
+    df.rename(columns={
+        "Group_Name": "Group_Name_x",
+        "Brand": "Brand_x",
+        "Product_Name": "Product_Name_x",
+        "Year Available": "Year_Available"
+    }, inplace=True)
+
+    # Ensure required columns are present
+    required_cols = ["Group_Name_x", "Brand_x", "Product_ID", "Product_Name_x", "Year_Available", "Year", "Month", "Current_Month_Price"]
+    missing = [col for col in required_cols if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required columns in {path}: {missing}")
+
+    # Filter unwanted products
+    df = df[df["Group_Name_x"] != "APPLE_BB"]
+
+    df["Main_Group"] = df["Group_Name_x"].apply(map_main_group)
+    return df
+
+
+# Products with enough history for their own curve
+def established(catalog):
+    return catalog[catalog["Product_ID"].isin(catalog["Product_ID"].value_counts()[lambda x: x > MIN_HISTORY].index)]
+
+
+# Newly released products the asset table leaves out
+def new_releases(catalog):
+    return catalog[catalog["Product_ID"].isin(catalog["Product_ID"].value_counts()[lambda x: x <= MIN_HISTORY].index)]
+
+
+# Validated (clean, quarantine) tables for a data version. Validation runs once per
+# version; the result is shared across replicas when a disk cache is configured.
+@lru_cache(maxsize=2)
+def load_checked(version, path=DATA_PATH):
+    return cached(content_key("checked", SCHEMA_VERSION, version), lambda: validate(read_catalog(path)))
+
+
+def load_catalog(version, path=DATA_PATH):
+    return load_checked(version, path)[0]
+
+
+def load_quarantine(version, path=DATA_PATH):
+    return load_checked(version, path)[1]
+
+
+def load_assets(version, path=DATA_PATH):
+    return cached(content_key("assets", SCHEMA_VERSION, version), lambda: established(load_catalog(version, path)))
+
+
+# Cohort market curves for a data version, computed once alongside the asset table
+def load_cohorts(version, path=DATA_PATH):
+    return cached(content_key("cohorts", SCHEMA_VERSION, version), lambda: cohort_curves(load_assets(version, path)))
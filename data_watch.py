@@ -0,0 +1,154 @@
+import copy
+import hashlib
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+from cohorts import cohort_curves
+from data_source import DATA_PATH, data_version, load_assets, load_cohorts
+from neighbours import NeighbourIndex
+from quotes import QuoteTable
+from search import SearchIndex
+
+
+# Seconds between checks of the data file for a new version
+WATCH_INTERVAL = float(os.environ.get("DATA_WATCH_INTERVAL", "30"))
+
+logger = logging.getLogger(__name__)
+
+
+# Products whose rows differ between two snapshots, including added and removed ones
+class Changes:
+    def __init__(self, old, new):
+        old_products, new_products = old.digests("Product_ID"), new.digests("Product_ID")
+        self.removed = set(old_products.index.difference(new_products.index))
+        self.changed = set(new_products.index[new_products.ne(old_products.reindex(new_products.index))])
+
+    @property
+    def products(self):
+        return self.changed | self.removed
+
+    def __bool__(self):
+        return bool(self.products)
+
+    def __repr__(self):
+        return f"Changes({len(self.changed)} changed, {len(self.removed)} removed products)"
+
+
+# Asset table of one data version and everything derived from it. The derived
+# structures are built on first use, or carried over from the previous snapshot
+# by updated(), which only recomputes the products that changed.
+class DataSnapshot:
+    def __init__(self, version, assets, path=DATA_PATH):
+        self.version = version
+        self.assets = assets
+        self.path = path
+        self.row_hashes = pd.util.hash_pandas_object(assets, index=False)
+        self.changes = None
+        self._built = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, version, path=DATA_PATH):
+        return cls(version, load_assets(version, path), path)
+
+    def _get(self, name, build):
+        with self._lock:
+            if name not in self._built:
+                self._built[name] = build()
+            return self._built[name]
+
+    @property
+    def quote_table(self):
+        return self._get("quote_table", lambda: QuoteTable(self.assets))
+
+    @property
+    def neighbour_index(self):
+        return self._get("neighbour_index", lambda: NeighbourIndex.build(self.assets))
+
+    @property
+    def search_index(self):
+        return self._get("search_index", lambda: SearchIndex(self.assets))
+
+    @property
+    def cohorts(self):
+        return self._get("cohorts", lambda: load_cohorts(self.version, self.path))
+
+    # Order-independent digest of the rows under each key
+    def digests(self, by):
+        return self.row_hashes.groupby([self.assets[col] for col in ([by] if isinstance(by, str) else by)]).sum()
+
+    # Cache key for the content of some rows, so results for products a data
+    # refresh did not touch stay valid across versions
+    def rows_key(self, row_ids):
+        return hashlib.sha256(self.row_hashes.loc[list(row_ids)].to_numpy().tobytes()).hexdigest()[:16]
+
+    # Snapshot of a new version, reusing this one's structures for unchanged products
+    def updated(self, version, assets):
+        new = DataSnapshot(version, assets, self.path)
+        changes = new.changes = Changes(self, new)
+        if not changes:
+            new._built = dict(self._built)
+            return new
+
+        products = changes.products
+        touched = assets[assets["Product_ID"].isin(changes.changed)]
+        new._built["quote_table"] = copy.copy(self.quote_table).refresh(assets, products)
+
+        neighbour_index = copy.deepcopy(self.neighbour_index).remove(changes.removed)
+        new._built["neighbour_index"] = neighbour_index.add(touched) if not touched.empty else neighbour_index
+
+        new._built["search_index"] = SearchIndex(assets)
+
+        # Only cohorts in a Main Group with a changed product are recomputed
+        old_groups = self.assets.loc[self.assets["Product_ID"].isin(products), "Main_Group"]
+        groups = set(old_groups) | set(touched["Main_Group"])
+        kept = self.cohorts[~self.cohorts.index.get_level_values("Main_Group").isin(groups)]
+        recomputed = cohort_curves(assets[assets["Main_Group"].isin(groups)])
+        new._built["cohorts"] = pd.concat([kept, recomputed]).sort_index()
+        return new
+
+
+# Polls the data file and swaps in a new snapshot once it is fully built. Sessions
+# keep reading `current` (the old snapshot) until the swap, so a refresh never
+# blocks a request. on_ready(snapshot) runs before the swap, e.g. to warm caches.
+class DataWatcher:
+    def __init__(self, path=DATA_PATH, interval=WATCH_INTERVAL, on_ready=None):
+        self.path = path
+        self.interval = interval
+        self.on_ready = on_ready
+        self.current = DataSnapshot.load(data_version(path), path)
+        # Cohort curves are computed with the data; the rest is built on first use
+        self.current.cohorts
+        self.error = None
+        self._thread = threading.Thread(target=self._watch, name="data-watch", daemon=True)
+        self._thread.start()
+
+    # Picks up a new version of the file if there is one; True when it was swapped in
+    def check(self):
+        version = data_version(self.path)
+        if version == self.current.version:
+            return False
+
+        started = time.perf_counter()
+        snapshot = self.current.updated(version, load_assets(version, self.path))
+        if self.on_ready is not None:
+            self.on_ready(snapshot)
+        self.current = snapshot
+        self.error = None
+        logger.info("Data version %s live after %.1fs: %r", version, time.perf_counter() - started, snapshot.changes)
+        return True
+
+    # A file that fails to load (e.g. still being written) leaves the old version
+    # serving and is retried on the next poll
+    def _watch(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check()
+            except Exception as e:
+                self.error = e
+                logger.exception("Data refresh from %s failed", self.path)
@@ -0,0 +1,160 @@
+import numpy as np
+
+# Scenario multipliers per return grade
+GRADE_FACTORS = {"A": 0.90, "B": 0.75, "C": 0.60, "D": 0.0}
+GRADES = list(GRADE_FACTORS)
+
+# Billing agreements, keyed by their residual value column. Every agreement is
+# priced from the normalized (A, B, C, D) grade weights in the same steps:
+#   shift   - added to the weights, floored at zero and renormalized
+#   billed  - grades the customer is billed for; the other weights are dropped
+#             and the rest renormalized (zero when none of them is returned)
+#   factors - multiplier per grade, GRADE_FACTORS unless given
+#   scale   - multiplier on the result
+# and described by
+#   name    - short name in quotes (defaults to the key)
+#   percent - column with the value as a percent of the original price (defaults to "<key>_%")
+#   label   - column label in the "Residual Scenarios Table"; agreements without one are left out of it
+#   plot    - legend label in the residual forecast chart; agreements without one are not plotted
+# Adding an agreement here adds its columns everywhere scenarios are computed.
+AGREEMENT_DEFINITIONS = {
+    "Expected_Residual": {
+        "name": "Expected", "percent": "Expected_%", "label": "Expected Case (Weighted A–D)", "plot": "Expected Case",
+    },
+    # Full Damage Billing, favors A/B
+    "Best_Case": {
+        "name": "Full Damage", "percent": "Best_%", "label": "Full Damage Billing", "plot": "Full Damage",
+        "shift": (0.1, 0.05, -0.075, -0.075),
+    },
+    # Favors C/D
+    "Worst_Case": {"name": "Worst", "percent": "Worst_%", "shift": (-0.075, -0.075, 0.05, 0.1)},
+    # Customer pays only for C and D
+    "Medium_Damage_Billing": {
+        "name": "Medium Damage", "percent": "Medium_%", "label": "Medium Damage Billing", "plot": "Medium Damage",
+        "billed": "CD",
+    },
+    # Customer pays nothing, company absorbs all risk
+    "No_Damage_Billing": {
+        "name": "No Damage", "percent": "No_Damage_%", "label": "No Damage Billing", "plot": "No Damage",
+        "scale": 0.85,
+    },
+    # Customer pays only for Grade D
+    "D_Only_Billing": {
+        "name": "D-Only", "percent": "D_Only_%", "label": "D-Only Billing",
+        "factors": {"A": 1.0, "B": 1.0, "C": 1.0, "D": 0.0},
+    },
+}
+
+
+def agreement_names(definitions=AGREEMENT_DEFINITIONS):
+    return {key: spec.get("name", key) for key, spec in definitions.items()}
+
+
+# Percent column of every residual value column
+def percent_columns(definitions=AGREEMENT_DEFINITIONS):
+    return {key: spec.get("percent", f"{key}_%") for key, spec in definitions.items()}
+
+
+# Display label of every percent column that has one, from the `field` key
+def scenario_labels(definitions=AGREEMENT_DEFINITIONS, field="label"):
+    percents = percent_columns(definitions)
+    return {percents[key]: spec[field] for key, spec in definitions.items() if field in spec}
+
+
+# Column labels of the "Residual Scenarios Table" and legend labels of the forecast chart
+SCENARIO_LABELS = scenario_labels()
+SCENARIO_PLOT_LABELS = scenario_labels(field="plot")
+
+DEPRECIATION_COLUMNS = ["Year-Month", "Months_Since_Release", "Current_Month_Price", "Depreciation_%", "Depreciation_NOK"]
+
+
+def months_since(df, release_date):
+    return (
+        (df["Date"].dt.year - release_date.year) * 12 +
+        (df["Date"].dt.month - release_date.month)
+    )
+
+
+# Compiles the agreements into a (weight mix, agreement) matrix of multipliers
+# on Current_Month_Price, one row per (A, B, C, D) grade mix
+def agreement_matrix(weight_mixes, definitions=AGREEMENT_DEFINITIONS):
+    weights = np.asarray(weight_mixes, dtype=float).reshape(-1, len(GRADES))
+    weights = weights / weights.sum(axis=1, keepdims=True)
+
+    n = len(definitions)
+    shift = np.zeros((n, len(GRADES)))
+    billed = np.ones((n, len(GRADES)))
+    factors = np.tile([GRADE_FACTORS[g] for g in GRADES], (n, 1))
+    scale = np.ones(n)
+    for i, spec in enumerate(definitions.values()):
+        shift[i] = spec.get("shift", 0.0)
+        if "billed" in spec:
+            billed[i] = [g in spec["billed"] for g in GRADES]
+        if "factors" in spec:
+            factors[i] = [spec["factors"][g] for g in GRADES]
+        scale[i] = spec.get("scale", 1.0)
+
+    # (mix, agreement, grade) shares after each agreement's adjustments
+    shares = np.maximum(weights[:, None, :] + shift[None, :, :], 0)
+    shares = shares / shares.sum(axis=2, keepdims=True)
+    shares = shares * billed[None, :, :]
+    totals = shares.sum(axis=2, keepdims=True)
+    shares = np.divide(shares, totals, out=np.zeros_like(shares), where=totals > 0)
+    return np.einsum("mag,ag->ma", shares, factors) * scale
+
+
+# Adds the scenario value and percent columns. Original_Price may be a scalar or a column.
+# All agreements for all rows come from one (rows, 1) x (1, agreements) product.
+def add_scenarios(df, weights):
+    coefficients = agreement_matrix([weights])
+    prices = df["Current_Month_Price"].to_numpy(dtype=float)[:, None]
+    values = prices @ coefficients
+    original = np.broadcast_to(np.asarray(df["Original_Price"], dtype=float), len(df))[:, None]
+    percents = 100 * values / original
+
+    for i, (column, percent) in enumerate(percent_columns().items()):
+        df[column] = values[:, i]
+        df[percent] = percents[:, i]
+    return df
+
+
+# Depreciation and residual scenarios for one selected product.
+# Returns an empty frame when no records fall after the release date.
+def compute_scenarios(matching_assets, orig_price, release_date, weights):
+    df = matching_assets.copy()
+    if df.empty:
+        return df
+
+    # Date comes with the validated asset table
+    df = df[df["Date"] >= release_date].sort_values("Date")
+    if df.empty:
+        return df
+
+    df["Original_Price"] = orig_price
+    df["Depreciation_NOK"] = orig_price - df["Current_Month_Price"]
+    df["Depreciation_%"] = 100 * df["Depreciation_NOK"] / orig_price
+    df["Months_Since_Release"] = months_since(df, release_date)
+    add_scenarios(df, weights)
+
+    df["Year-Month"] = df["Date"].dt.strftime("%Y-%m")
+    return df
+
+
+# The same tables for many products at once. Each product is released at its
+# first observed month and its first observed price is the original price.
+def catalog_scenarios(assets, weights):
+    df = assets.sort_values(["Product_ID", "Date"])
+
+    first = df.groupby("Product_ID", sort=False)
+    release = first["Date"].transform("min")
+    df["Original_Price"] = first["Current_Month_Price"].transform("first")
+    df["Depreciation_NOK"] = df["Original_Price"] - df["Current_Month_Price"]
+    df["Depreciation_%"] = 100 * df["Depreciation_NOK"] / df["Original_Price"]
+    df["Months_Since_Release"] = (
+        (df["Date"].dt.year - release.dt.year) * 12 +
+        (df["Date"].dt.month - release.dt.month)
+    )
+    add_scenarios(df, weights)
+
+    df["Year-Month"] = df["Date"].dt.strftime("%Y-%m")
+    return df
@@ -0,0 +1,104 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+
+# Optional cache shared by every replica through a common volume. Disabled unless
+# SHARED_CACHE_DIR is set.
+SHARED_CACHE_DIR = os.environ.get("SHARED_CACHE_DIR")
+SHARED_CACHE_TTL = float(os.environ.get("SHARED_CACHE_TTL", str(7 * 24 * 3600)))
+SHARED_CACHE_MAX_MB = float(os.environ.get("SHARED_CACHE_MAX_MB", "1024"))
+
+_MISSING = object()
+
+
+def content_key(*parts):
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+# SQLite store with TTL and size based eviction (least recently used first).
+# WAL mode plus a busy timeout lets several processes read and write it at once.
+class DiskCache:
+    def __init__(self, directory, ttl=SHARED_CACHE_TTL, max_bytes=SHARED_CACHE_MAX_MB * 1024 * 1024):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "cache.sqlite")
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB, size INTEGER, created REAL, accessed REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key, default=None):
+        conn = self._connect()
+        row = conn.execute("SELECT value, created FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return default
+        value, created = row
+        now = time.time()
+        if now - created > self.ttl:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            return default
+        conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        return pickle.loads(value)
+
+    def set(self, key, value):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), now, now),
+            )
+            self._evict(conn, now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM entries WHERE created < ?", (now - self.ttl,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed").fetchall():
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+shared_cache = DiskCache(SHARED_CACHE_DIR) if SHARED_CACHE_DIR else None
+
+
+# Use the shared cache when it is configured, otherwise just compute
+def cached(key, compute):
+    if shared_cache is None:
+        return compute()
+    return shared_cache.get_or_compute(key, compute)
@@ -0,0 +1,113 @@
+import argparse
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import xlsxwriter
+
+from data_source import data_version, load_assets
+from depreciation import DEPRECIATION_COLUMNS, SCENARIO_LABELS, catalog_scenarios
+
+
+# Products computed and written per chunk, which bounds memory during an export
+CHUNK_PRODUCTS = 500
+
+ID_COLUMNS = ["Product_ID", "Product_Name_x", "Brand_x", "Main_Group", "Group_Name_x"]
+RESIDUAL_COLUMNS = ["Months_Since_Release", "Original_Price"] + list(SCENARIO_LABELS.values())
+
+SHEETS = {
+    "Depreciation": ID_COLUMNS + DEPRECIATION_COLUMNS,
+    "Residual Scenarios": ["Product_ID", "Year-Month"] + RESIDUAL_COLUMNS,
+}
+
+# Parquet gets one table holding both sheets' columns
+PARQUET_SCHEMA = pa.schema(
+    [(col, pa.string()) for col in ID_COLUMNS + ["Year-Month"]]
+    + [("Months_Since_Release", pa.int64())]
+    + [(col, pa.float64()) for col in ["Current_Month_Price", "Depreciation_%", "Depreciation_NOK"] + RESIDUAL_COLUMNS[1:]]
+)
+
+
+def select_scope(assets, main_group=None, group=None, brand=None):
+    if main_group:
+        assets = assets[assets["Main_Group"] == main_group]
+    if group:
+        assets = assets[assets["Group_Name_x"] == group]
+    if brand:
+        assets = assets[assets["Brand_x"] == brand]
+    return assets
+
+
+# Depreciation and residual tables for a few hundred products at a time
+def export_chunks(assets, weights, chunk_size=CHUNK_PRODUCTS):
+    assets = assets.sort_values("Product_ID", kind="stable")
+    # Row offset where each product starts, so chunks are plain slices
+    starts = assets["Product_ID"].ne(assets["Product_ID"].shift()).to_numpy().nonzero()[0]
+    bounds = list(starts[::chunk_size]) + [len(assets)]
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        df = catalog_scenarios(assets.iloc[start:end], weights).rename(columns=SCENARIO_LABELS)
+        yield df[PARQUET_SCHEMA.names].round(2)
+
+
+def write_parquet(chunks, target):
+    with pq.ParquetWriter(target, PARQUET_SCHEMA) as writer:
+        for df in chunks:
+            writer.write_table(pa.Table.from_pandas(df, schema=PARQUET_SCHEMA, preserve_index=False))
+
+
+def write_xlsx(chunks, target):
+    # constant_memory flushes each row to disk as soon as the next one starts
+    wb = xlsxwriter.Workbook(target, {
+        "constant_memory": True,
+        "in_memory": False,
+        "nan_inf_to_errors": True,
+        "strings_to_formulas": False,
+        "strings_to_urls": False,
+    })
+    sheets = {name: wb.add_worksheet(name) for name in SHEETS}
+    rows = dict.fromkeys(SHEETS, 1)
+    for name, columns in SHEETS.items():
+        sheets[name].write_row(0, 0, columns)
+    for df in chunks:
+        df = df.astype(object).where(df.notna(), None)
+        for name, columns in SHEETS.items():
+            for row in df[columns].itertuples(index=False):
+                sheets[name].write_row(rows[name], 0, row)
+                rows[name] += 1
+    wb.close()
+
+
+WRITERS = {"parquet": write_parquet, "xlsx": write_xlsx}
+
+
+# target is a path or a binary buffer
+def export_scenarios(assets, target, fmt, weights, chunk_size=CHUNK_PRODUCTS):
+    WRITERS[fmt](export_chunks(assets, weights, chunk_size), target)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export depreciation and residual scenario tables")
+    parser.add_argument("output", help="Output file (.parquet or .xlsx)")
+    parser.add_argument("--main-group")
+    parser.add_argument("--group", help="Subcategory (Group_Name_x)")
+    parser.add_argument("--brand")
+    parser.add_argument("--weights", nargs=4, type=float, default=[0.25, 0.25, 0.25, 0.25],
+                        metavar=("A", "B", "C", "D"), help="Grade A-D return weights")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_PRODUCTS)
+    args = parser.parse_args()
+
+    fmt = args.output.rsplit(".", 1)[-1].lower()
+    if fmt not in WRITERS:
+        parser.error("output must end in .parquet or .xlsx")
+
+    start = time.time()
+    assets = select_scope(load_assets(data_version()), args.main_group, args.group, args.brand)
+    if assets.empty:
+        parser.error("no products match the given scope")
+    export_scenarios(assets, args.output, fmt, tuple(args.weights), args.chunk_size)
+    print(f"Exported {assets['Product_ID'].nunique()} products ({len(assets)} rows) to {args.output} "
+          f"in {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
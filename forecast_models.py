@@ -0,0 +1,210 @@
+import argparse
+import hashlib
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+
+from curves import curve_panel, periods
+from data_source import data_version, load_assets
+
+
+# Saved per-product forecast models, refreshed by `python forecast_models.py`
+MODEL_PATH = os.environ.get("FORECAST_MODEL_PATH", "forecast_models.pkl")
+
+# Same settings as the forecast in calculator copy.py
+LGBM_PARAMS = {
+    "objective": "regression", "learning_rate": 0.1, "num_leaves": 10,
+    "min_data_in_leaf": 2, "min_data_in_bin": 1, "num_threads": 1, "verbose": -1,
+}
+FULL_ROUNDS = 50
+# calculator copy.py only forecasts products with at least this many records
+MIN_ROWS = 10
+
+# A warm start boosts INCREMENTAL_ROUNDS more trees on the new months plus the
+# CONTEXT_MONTHS before them, so the trees can split the new months off
+INCREMENTAL_ROUNDS = 10
+CONTEXT_MONTHS = 3
+# A full fit seeds its running error from a second fit without its last HOLDOUT_MONTHS
+HOLDOUT_MONTHS = 3
+# Full retrain when the saved model's error on the new months exceeds DRIFT_RATIO
+# times its running error (never less than DRIFT_FLOOR), or after MAX_STAGES warm starts
+DRIFT_RATIO = 1.5
+DRIFT_FLOOR = 0.05
+MAX_STAGES = 12
+
+
+# Same trees as lgb.train, without its parameter copies, callback setup and model
+# string round trip, which cost about as much as the boosting of a warm start
+def _train(t, price, rounds, init_score=None, min_data_in_leaf=LGBM_PARAMS["min_data_in_leaf"]):
+    import lightgbm as lgb
+    params = dict(LGBM_PARAMS, min_data_in_leaf=min_data_in_leaf)
+    booster = lgb.Booster(params, lgb.Dataset(t[:, None], price, init_score=init_score, params=params))
+    for _ in range(rounds):
+        booster.update()
+    return booster
+
+
+def _digest(period, price):
+    return hashlib.sha256(np.column_stack([period, price]).astype("float64").tobytes()).hexdigest()[:16]
+
+
+# LightGBM forecast of one product's price by months since its first listing. The
+# model is a chain of boosting stages: the full fit, then one stage per warm
+# start, each trained on the residuals of the stages before it.
+class ProductForecast:
+    def __init__(self, first_period):
+        self.first_period = first_period
+        self.stages = []
+        self.trained_through = None
+        self.history = None
+        self.error = None
+
+    def predict(self, t):
+        t = np.asarray(t, dtype="float64")[:, None]
+        return sum(stage.predict(t) for stage in self.stages)
+
+    def predict_periods(self, future_periods):
+        return self.predict(np.asarray(future_periods) - self.first_period)
+
+    # Starts a new chain. Its running error is that of a fit without the last
+    # HOLDOUT_MONTHS on those months; None for products too short to hold any out.
+    def fit(self, t, price, period):
+        self.stages = [_train(t, price, FULL_ROUNDS)]
+        self._trained(period, price)
+        self.error = None
+        train = period <= period.max() - HOLDOUT_MONTHS
+        if train.sum() >= MIN_ROWS:
+            holdout = _train(t[train], price[train], FULL_ROUNDS).predict(t[~train][:, None])
+            self.error = float(np.mean(np.abs(holdout - price[~train]) / price[~train]))
+        return self
+
+    # Continues boosting from the saved stages on the records after trained_through
+    def warm_start(self, t, price, period):
+        new = period > self.trained_through
+        rows = slice(max(0, int(new.argmax()) - CONTEXT_MONTHS), None)
+        init_score = self.predict(t[rows])
+        self.stages.append(_train(t[rows], price[rows], INCREMENTAL_ROUNDS, init_score, min_data_in_leaf=1))
+        self._trained(period, price)
+        return self
+
+    def _trained(self, period, price):
+        self.trained_through = int(period.max())
+        self.history = _digest(period, price)
+
+    # Mean absolute percentage error on the records after trained_through
+    def new_error(self, t, price, period):
+        new = period > self.trained_through
+        return float(np.mean(np.abs(self.predict(t[new]) - price[new]) / price[new]))
+
+
+# Saved forecasts for the whole catalog. refresh() warm-starts every product that
+# got new months and only retrains from scratch when a product is new, its earlier
+# records were revised, or its error drifted.
+class ForecastStore:
+    def __init__(self, models=None):
+        self.models = models or {}
+
+    def __len__(self):
+        return len(self.models)
+
+    def __contains__(self, product_id):
+        return product_id in self.models
+
+    def __getitem__(self, product_id):
+        return self.models[product_id]
+
+    @classmethod
+    def load(cls, path=MODEL_PATH):
+        if not os.path.exists(path):
+            return cls()
+        with open(path, "rb") as f:
+            return cls(pickle.load(f))
+
+    # Written to a temporary file first so readers never see a partial store
+    def save(self, path=MODEL_PATH):
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(self.models, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def _refresh_product(self, product_id, t, price, period, full):
+        model = self.models.get(product_id)
+        first_period = int(period.min())
+        if full or model is None or model.first_period != first_period:
+            self.models[product_id] = ProductForecast(first_period).fit(t, price, period)
+            return "full" if model is not None else "new", None
+
+        known = period <= model.trained_through
+        if _digest(period[known], price[known]) != model.history:
+            model.fit(t, price, period)
+            return "revised", None
+        if known.all():
+            return "unchanged", None
+
+        # The refit seeds its own running error; only errors of the chain that is
+        # kept are averaged into it
+        error = model.new_error(t, price, period)
+        limit = DRIFT_RATIO * max(model.error or 0.0, DRIFT_FLOOR)
+        if error > limit or len(model.stages) > MAX_STAGES:
+            model.fit(t, price, period)
+            return ("drift" if error > limit else "compacted"), error
+        model.error = error if model.error is None else 0.5 * (model.error + error)
+        model.warm_start(t, price, period)
+        return "warm", error
+
+    # Brings every product in `assets` up to date; returns one row per product
+    # with the action taken, the error on its new months and the seconds spent
+    def refresh(self, assets, full=False):
+        panel = curve_panel(assets).sort_values(["Product_ID", "period"])
+        report = []
+        for product_id, series in panel.groupby("Product_ID", sort=False):
+            if len(series) < MIN_ROWS:
+                continue
+            start = time.perf_counter()
+            action, error = self._refresh_product(
+                product_id,
+                series["t"].to_numpy(dtype="float64"),
+                np.exp(series["log_price"].to_numpy()),
+                series["period"].to_numpy(),
+                full,
+            )
+            report.append((product_id, action, error, time.perf_counter() - start))
+        return pd.DataFrame(report, columns=["Product_ID", "Action", "New_Month_MAPE", "Seconds"])
+
+    # Mean forecast over several products for the calendar months in future_periods;
+    # None when any of them has no saved model
+    def predict_periods(self, product_ids, future_periods):
+        if not len(product_ids) or any(product_id not in self for product_id in product_ids):
+            return None
+        return np.mean([self[product_id].predict_periods(future_periods) for product_id in product_ids], axis=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the saved LightGBM forecasts for the whole catalog")
+    parser.add_argument("--full", action="store_true", help="Retrain every product from scratch")
+    parser.add_argument("--model-path", default=MODEL_PATH)
+    parser.add_argument("--until", help="Only use records up to this month (YYYY-MM), e.g. to replay a monthly refresh")
+    args = parser.parse_args()
+
+    assets = load_assets(data_version())
+    if args.until:
+        year, month = map(int, args.until.split("-"))
+        assets = assets[periods(assets["Year"], assets["Month"]) <= periods(year, month)]
+
+    store = ForecastStore() if args.full else ForecastStore.load(args.model_path)
+    start = time.time()
+    report = store.refresh(assets, full=args.full)
+    elapsed = time.time() - start
+    store.save(args.model_path)
+
+    print(f"Refreshed {len(report)} products in {elapsed:.1f}s ({len(store)} saved to {args.model_path})\n")
+    print(report.groupby("Action").agg(
+        Products=("Product_ID", "size"), Seconds=("Seconds", "sum"), New_Month_MAPE=("New_Month_MAPE", "mean")
+    ).round(3).to_string())
+
+
+if __name__ == "__main__":
+    main()
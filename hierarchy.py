@@ -0,0 +1,185 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from curves import curve_panel, periods
+from data_source import data_version, load_assets
+
+
+# Hierarchy levels from the top down; every level is nested in the one above it.
+# Main Groups share no nodes, so each one is forecast and reconciled on its own.
+LEVELS = ["Main_Group", "Group_Name_x", "Brand_x", "Product_ID"]
+AGGREGATE_LEVELS = LEVELS[:-1]
+HORIZON = 12
+# Decay rates are fitted on the most recent months of every product
+WINDOW_MONTHS = 12
+# A product's own decay rate is shrunk towards its brand's, as if the brand rate
+# were backed by this much spread in months (sum of squared deviations)
+SHRINK_WEIGHT = 20.0
+
+
+# Level attributes of the products listed in the origin month, one row per Product_ID
+def active_products(assets, origin):
+    listed = assets[periods(assets["Year"], assets["Month"]) == origin]
+    return listed.groupby("Product_ID")[AGGREGATE_LEVELS].first().dropna().sort_index()
+
+
+# Aggregate nodes above the products and the (node, product) summing matrix A;
+# the full summing matrix is S = [A; I]
+def summing_matrix(products):
+    nodes, rows = [], []
+    for depth in range(1, len(AGGREGATE_LEVELS) + 1):
+        levels = AGGREGATE_LEVELS[:depth]
+        for key, members in products.groupby(levels, sort=True):
+            nodes.append((LEVELS[depth - 1],) + key + ("All",) * (len(LEVELS) - 1 - depth))
+            rows.append(products.index.get_indexer(members.index))
+
+    A = np.zeros((len(nodes), len(products)))
+    for i, members in enumerate(rows):
+        A[i, members] = 1.0
+    return pd.DataFrame(nodes, columns=["Level"] + AGGREGATE_LEVELS), A
+
+
+# Monthly log-price slopes over the last WINDOW_MONTHS. Every aggregate node pools
+# the within-product trends of its members, weighted by how long each was listed
+# and by its value in the origin month, so the node follows the sum of its
+# products. Every product gets its own trend shrunk towards its brand node's.
+def decay_slopes(panel, products, nodes, A, origin, value):
+    recent = panel[(panel["period"] > origin - WINDOW_MONTHS) & panel["Product_ID"].isin(products.index)]
+    by_product = recent.groupby("Product_ID")
+    t = recent["t"] - by_product["t"].transform("mean")
+    y = recent["log_price"] - by_product["log_price"].transform("mean")
+    sums = pd.DataFrame({"sxx": t * t, "sxy": t * y}).groupby(recent["Product_ID"]).sum().reindex(products.index, fill_value=0.0)
+    sxx, sxy = A @ (value * sums["sxx"].to_numpy()), A @ (value * sums["sxy"].to_numpy())
+    aggregate = np.divide(sxy, sxx, out=np.zeros_like(sxy), where=sxx > 0)
+
+    brands = A[(nodes["Level"] == "Brand_x").to_numpy()]
+    brand_slope = brands.T @ aggregate[(nodes["Level"] == "Brand_x").to_numpy()]
+    bottom = (sums["sxy"].to_numpy() + SHRINK_WEIGHT * brand_slope) / (sums["sxx"].to_numpy() + SHRINK_WEIGHT)
+    return aggregate, bottom
+
+
+# WLS reconciliation: the coherent forecasts closest to the base ones when every
+# node's error variance grows with the square of its value in the origin month,
+# S (S'W^-1 S)^-1 S'W^-1 y_hat. With S = [A; I] and W = diag(W_a, W_b) the
+# Woodbury identity turns the (products x products) inverse into a (nodes x nodes)
+# solve, applied to every horizon at once. Unlike OLS, which spreads an aggregate's
+# correction evenly over its products and pushes cheap ones below zero, each
+# product takes a share in proportion to its variance, so cheap ones barely move.
+def reconcile(A, base_aggregate, base_bottom, weight_aggregate, weight_bottom):
+    rhs = base_bottom + weight_bottom[:, None] * (A.T @ (base_aggregate / weight_aggregate[:, None]))
+    correction = np.linalg.solve(np.diag(weight_aggregate) + (A * weight_bottom) @ A.T, A @ rhs)
+    bottom = rhs - weight_bottom[:, None] * (A.T @ correction)
+    return A @ bottom, bottom
+
+
+# Negative product forecasts left by the reconciliation are clipped to zero and the
+# aggregates summed again, so the result stays coherent. Flags every clipped
+# product and every aggregate above one.
+def clip_negative(A, bottom):
+    clipped = bottom < 0
+    bottom = np.where(clipped, 0.0, bottom)
+    return A @ bottom, bottom, (A @ clipped) > 0, clipped
+
+
+# Base and reconciled forecasts for one Main Group, long format with one row per
+# (node, horizon). Every node decays exponentially at its own rate from its
+# actual value (sum of its products' prices) in the origin month.
+def forecast_block(assets, origin, horizon=HORIZON):
+    products = active_products(assets, origin)
+    if products.empty:
+        return pd.DataFrame()
+    panel = curve_panel(assets[assets["Product_ID"].isin(products.index)])
+    nodes, A = summing_matrix(products)
+
+    listed = panel[panel["period"] == origin].groupby("Product_ID")["log_price"].first()
+    actual = np.exp(listed.reindex(products.index).to_numpy())
+    steps = np.arange(1, horizon + 1)
+
+    value = A @ actual
+    aggregate_slopes, bottom_slopes = decay_slopes(panel, products, nodes, A, origin, actual)
+    base_aggregate = value[:, None] * np.exp(aggregate_slopes[:, None] * steps[None, :])
+    base_bottom = actual[:, None] * np.exp(bottom_slopes[:, None] * steps[None, :])
+
+    aggregate, bottom = reconcile(A, base_aggregate, base_bottom, value ** 2, actual ** 2)
+    aggregate, bottom, aggregate_clipped, bottom_clipped = clip_negative(A, bottom)
+
+    product_nodes = products.reset_index().assign(Level="Product_ID")[["Level"] + LEVELS]
+    nodes = pd.concat([nodes.assign(Product_ID="All"), product_nodes], ignore_index=True)
+    base = np.vstack([base_aggregate, base_bottom])
+    reconciled = np.vstack([aggregate, bottom])
+    return pd.DataFrame({
+        **{col: np.repeat(nodes[col].to_numpy(), horizon) for col in nodes.columns},
+        "Horizon": np.tile(steps, len(nodes)),
+        "Period": origin + np.tile(steps, len(nodes)),
+        "Base": base.ravel(),
+        "Reconciled": reconciled.ravel(),
+        "Clipped": np.vstack([aggregate_clipped, bottom_clipped]).ravel(),
+    })
+
+
+# Forecasts the whole hierarchy from the origin month (the latest one by default),
+# one Main Group per task spread over worker processes
+def run_hierarchy(assets, origin=None, horizon=HORIZON, workers=None):
+    if origin is None:
+        origin = int(periods(assets["Year"], assets["Month"]).max())
+    assets = assets[periods(assets["Year"], assets["Month"]) <= origin]
+    groups = [group for _, group in assets.groupby("Main_Group", sort=True)]
+
+    workers = min(workers or os.cpu_count() or 1, len(groups))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        blocks = list(executor.map(forecast_block, groups, [origin] * len(groups), [horizon] * len(groups)))
+    return pd.concat(blocks, ignore_index=True)
+
+
+# Largest gap between any aggregate and the sum of its products, per horizon
+def coherence_gap(forecasts, column="Reconciled"):
+    products = forecasts[forecasts["Level"] == "Product_ID"]
+    gaps = []
+    for depth, level in enumerate(AGGREGATE_LEVELS, start=1):
+        keys = AGGREGATE_LEVELS[:depth] + ["Horizon"]
+        summed = products.groupby(keys)[column].sum()
+        nodes = forecasts[forecasts["Level"] == level].set_index(keys)[column]
+        gaps.append((nodes - summed.reindex(nodes.index)).abs().groupby("Horizon").max())
+    return pd.concat(gaps, axis=1).max(axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hierarchical residual value forecast with WLS reconciliation")
+    parser.add_argument("--origin", help="Forecast from this month (YYYY-MM); defaults to the latest month")
+    parser.add_argument("--horizon", type=int, default=HORIZON)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", help="Write every forecast to this file (.parquet or .csv)")
+    args = parser.parse_args()
+
+    assets = load_assets(data_version())
+    origin = None
+    if args.origin:
+        year, month = map(int, args.origin.split("-"))
+        origin = int(periods(year, month))
+
+    start = time.time()
+    forecasts = run_hierarchy(assets, origin, args.horizon, args.workers)
+    elapsed = time.time() - start
+
+    counts = forecasts[forecasts["Horizon"] == 1]["Level"].value_counts().reindex(LEVELS)
+    print(f"Forecast {counts.sum()} nodes x {args.horizon} months in {elapsed:.1f}s")
+    print(counts.to_string())
+    clipped = forecasts[(forecasts["Level"] == "Product_ID") & forecasts["Clipped"]]
+    print(f"\nProduct forecasts clipped at zero: {len(clipped)} ({clipped['Product_ID'].nunique()} products)")
+    print("Largest aggregate - sum of products gap: base {:.2f}, reconciled {:.2e}".format(
+        coherence_gap(forecasts, "Base").max(), coherence_gap(forecasts).max()
+    ))
+    if args.output:
+        if args.output.endswith(".parquet"):
+            forecasts.to_parquet(args.output, index=False)
+        else:
+            forecasts.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
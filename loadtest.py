@@ -0,0 +1,232 @@
+import argparse
+import gc
+import importlib
+import multiprocessing
+import os
+import random
+import resource
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from streamlit.runtime.state import SCRIPT_RUN_WITHOUT_ERRORS_KEY
+from streamlit.testing.v1 import AppTest
+
+
+SCRIPT_TIMEOUT = 600
+CASCADE = ["Main Group", "Subcategory", "Brand", "Product"]
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        # Peak instead of current outside Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _widget(elements, label):
+    return next((w for w in elements if w.label == label), None)
+
+
+# AppTest swaps process-wide Streamlit state (the runtime, config, __main__) on
+# every run, so sessions sharing a process take turns through this lock. Only the
+# memory run (_serve) puts several sessions in one process.
+_run_lock = threading.Lock()
+
+
+# One simulated analyst: opens the app, walks the sidebar cascade with random
+# picks, runs the forecast and then tweaks the grade weights a few times.
+# Returns (action, seconds, error) per rerun.
+class Session:
+    def __init__(self, script, seed):
+        self.app = AppTest.from_file(os.path.abspath(script), default_timeout=SCRIPT_TIMEOUT)
+        self.random = random.Random(seed)
+        self.timings = []
+
+    def _run(self, action):
+        start = time.perf_counter()
+        with _run_lock:
+            self.app.run()
+        if len(self.app.exception):
+            error = str(self.app.exception[0].message)
+        elif not self.app.session_state[SCRIPT_RUN_WITHOUT_ERRORS_KEY]:
+            # Compile errors never reach st.exception
+            error = "script did not finish"
+        else:
+            error = None
+        self.timings.append((action, time.perf_counter() - start, error))
+
+    def play(self, grade_changes):
+        self._run("open")
+        for label in CASCADE:
+            widget = _widget(self.app.sidebar.selectbox, label)
+            if widget is not None and widget.options:
+                widget.select(self.random.choice(widget.options))
+                self._run(f"select {label}")
+
+        button = next((b for b in self.app.button if b.label.startswith("Run")), None)
+        if button is not None:
+            button.click()
+            self._run("forecast")
+
+        for _ in range(grade_changes):
+            grade = _widget(self.app.number_input, f"Grade {self.random.choice('ABCD')} %")
+            if grade is None:
+                break
+            grade.set_value(round(self.random.uniform(0.05, 0.6), 2))
+            self._run("grade change")
+        return self.timings
+
+
+# Highest RSS of this process, sampled until stopped
+class PeakMemory:
+    def __init__(self, interval=0.05):
+        self.peak = rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, args=(interval,), daemon=True)
+        self._thread.start()
+
+    def _sample(self, interval):
+        while not self._stop.wait(interval):
+            self.peak = max(self.peak, rss_mb())
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return max(self.peak, rss_mb())
+
+
+_barrier = None
+
+
+# AppTest installs the app script as __main__ in the process that runs it, so
+# work sent to worker processes must name this module explicitly
+def _worker_module():
+    return importlib.import_module("loadtest")
+
+
+def _init_worker(script, barrier):
+    global _barrier
+    _barrier = barrier
+    # Load the data and build the per-version caches in this process up front
+    Session(script, seed=-1)._run("warm")
+
+
+def _cold_start(script, seed):
+    start = time.perf_counter()
+    timings = Session(script, seed).play(0)
+    return timings, time.perf_counter() - start
+
+
+def _play(script, seed, grade_changes):
+    session = Session(script, seed)
+    _barrier.wait()
+    start = time.time()
+    timings = session.play(grade_changes)
+    return timings, start, time.time()
+
+
+# Memory of one server: warms up, then holds `concurrency` sessions in threads of
+# this process, sharing its caches and data. Returns the RSS before they connect
+# and the peak while they run. Their reruns take turns (see _run_lock), so their
+# timings are not reported.
+def _serve(script, concurrency, grade_changes, seed):
+    Session(script, seed=-1)._run("warm")
+    gc.collect()
+    idle = rss_mb()
+
+    sessions = [Session(script, seed + i) for i in range(concurrency)]
+    threads = [threading.Thread(target=session.play, args=(grade_changes,)) for session in sessions]
+    peak = PeakMemory()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return idle, peak.stop()
+
+
+# Runs `concurrency` sessions at once and summarizes their reruns. Real Streamlit
+# runs every session's script in its own thread, while AppTest can only run one
+# script per process at a time, so for latency and throughput each session gets
+# its own worker process, warmed up from the shared disk cache, and all of them
+# start together. Memory comes from a separate run of all sessions in one process.
+def run_level(script, concurrency, grade_changes, seed=0):
+    worker = _worker_module()
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(concurrency)
+    with context.Pool(concurrency, initializer=worker._init_worker, initargs=(script, barrier)) as pool:
+        results = pool.starmap(worker._play, [(script, seed + i, grade_changes) for i in range(concurrency)], chunksize=1)
+    with context.Pool(1) as pool:
+        idle, peak = pool.apply(worker._serve, (script, concurrency, grade_changes, seed))
+
+    wall = max(end for _, _, end in results) - min(start for _, start, _ in results)
+    timings = pd.DataFrame([t for session, _, _ in results for t in session], columns=["Action", "Seconds", "Error"])
+    latency = timings["Seconds"].to_numpy() * 1000
+    return {
+        "Sessions": concurrency,
+        "Reruns": len(timings),
+        "Errors": int(timings["Error"].notna().sum()),
+        "Wall_s": wall,
+        "Reruns_per_s": len(timings) / wall,
+        "p50_ms": np.percentile(latency, 50),
+        "p95_ms": np.percentile(latency, 95),
+        "p99_ms": np.percentile(latency, 99),
+        "Idle_RSS_MB": idle,
+        "Peak_RSS_MB": peak,
+        "Load_MB": peak - idle,
+    }, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test through Streamlit's headless AppTest")
+    parser.add_argument("script", nargs="?", default="calculator.py")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 2, 4, 8, 16])
+    parser.add_argument("--grade-changes", type=int, default=5, help="Grade weight edits per session after the forecast")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write every rerun timing to this CSV")
+    args = parser.parse_args()
+
+    # Workers load the cleaned data from the shared disk cache the cold start fills
+    cache_dir = None
+    if not os.environ.get("SHARED_CACHE_DIR"):
+        cache_dir = tempfile.TemporaryDirectory(prefix="loadtest-cache-")
+        os.environ["SHARED_CACHE_DIR"] = cache_dir.name
+
+    # The parent never runs the app itself, see _worker_module()
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        cold, seconds = pool.apply(_worker_module()._cold_start, (args.script, args.seed))
+    print(f"Cold start: {seconds:.1f}s ({len(cold)} reruns)")
+    errors = {error for _, _, error in cold if error}
+    if errors:
+        print(f"Script errors: {errors}")
+
+    rows, all_timings = [], []
+    for level in args.concurrency:
+        summary, timings = run_level(args.script, level, args.grade_changes, args.seed)
+        rows.append(summary)
+        all_timings.append(timings.assign(Sessions=level))
+        print(
+            f"{level:>4} sessions: {summary['Reruns_per_s']:.1f} reruns/s, p95 {summary['p95_ms']:.0f} ms, "
+            f"one-process peak RSS {summary['Peak_RSS_MB']:.0f} MB"
+        )
+
+    print()
+    summary = pd.DataFrame(rows).set_index("Sessions")
+    print(summary.round(1).to_string())
+    if len(summary) > 1:
+        # Each session's own state is small next to the shared data, so the cost
+        # of a session is the slope of the server's memory over the session count
+        slope = np.polyfit(summary.index, summary["Load_MB"], 1)[0]
+        print(f"\nOne process's memory above idle grows {slope:.2f} MB per concurrent session")
+    if args.output:
+        pd.concat(all_timings).to_csv(args.output, index=False)
+    if cache_dir is not None:
+        cache_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+
+from curves import curve_panel
+
+
+# Attributes compared between products, with their weight in the distance
+CATEGORICAL_FEATURES = {"Main_Group": 4.0, "Group_Name_x": 2.0, "Brand_x": 2.0, "Class": 1.0, "Gen": 1.0}
+NUMERIC_FEATURES = {"Screen_Size": 1.0, "Storage": 1.0, "Year_Available": 1.0, "Launch_Price": 3.0, "Second_Price": 1.0}
+
+# Distance added for a numeric attribute missing on either side (in standard deviations)
+MISSING_PENALTY = 1.0
+CURVE_MONTHS = 36
+
+
+# One row per product: its attributes and log prices of its first two records
+def product_features(assets):
+    df = assets.copy()
+    df["Period"] = df["Year"] * 12 + df["Month"]
+    df = df.sort_values(["Product_ID", "Period"])
+    df["Screen_Size"] = pd.to_numeric(df["Screen_Size"], errors="coerce")
+    df["Log_Price"] = np.log(df["Current_Month_Price"].where(df["Current_Month_Price"] > 0))
+
+    products = df.groupby("Product_ID", sort=True)
+    features = products[["Product_Name_x"] + list(CATEGORICAL_FEATURES) + ["Screen_Size", "Storage", "Year_Available"]].first()
+    features["Launch_Price"] = products["Log_Price"].nth(0).set_axis(products.size().index)
+    second = df[products.cumcount() == 1].set_index("Product_ID")["Log_Price"]
+    features["Second_Price"] = second.reindex(features.index)
+    return features
+
+
+# Price as a share of the first observed price, by months since that price
+def retention_curves(assets):
+    panel = curve_panel(assets)
+    panel = panel[panel["t"] < CURVE_MONTHS]
+    launch = panel.groupby("Product_ID")["log_price"].transform("first")
+    panel["retention"] = np.exp(panel["log_price"] - launch)
+    curves = panel.pivot_table(index="Product_ID", columns="t", values="retention", aggfunc="mean")
+    return curves.reindex(columns=range(CURVE_MONTHS))
+
+
+# Nearest-neighbour index over established products. Categorical attributes are
+# stored as integer codes and numeric ones standardized, so a query is a couple
+# of vectorized comparisons against the whole catalog.
+class NeighbourIndex:
+    def __init__(self):
+        self.ids = np.array([], dtype=object)
+        self.names = np.array([], dtype=object)
+        self.codes = np.zeros((0, len(CATEGORICAL_FEATURES)), dtype="int32")
+        self.numeric = np.zeros((0, len(NUMERIC_FEATURES)), dtype="float32")
+        self.curves = np.zeros((0, CURVE_MONTHS), dtype="float32")
+        self.vocab = {col: {} for col in CATEGORICAL_FEATURES}
+        self.center = None
+        self.scale = None
+        self.cat_weights = np.array(list(CATEGORICAL_FEATURES.values()), dtype="float32")
+        self.num_weights = np.array(list(NUMERIC_FEATURES.values()), dtype="float32")
+
+    @classmethod
+    def build(cls, assets):
+        index = cls()
+        index.add(assets)
+        return index
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _encode(self, features):
+        codes = np.empty((len(features), len(CATEGORICAL_FEATURES)), dtype="int32")
+        for i, col in enumerate(CATEGORICAL_FEATURES):
+            vocab = self.vocab[col]
+            codes[:, i] = [vocab.setdefault(value, len(vocab)) for value in features[col].fillna("").astype(str)]
+        numeric = features[list(NUMERIC_FEATURES)].to_numpy(dtype="float64")
+        # Scaling is fixed by the first build so later additions stay comparable
+        if self.center is None:
+            self.center = np.nanmean(numeric, axis=0)
+            self.scale = np.nanstd(numeric, axis=0)
+            self.scale[~(self.scale > 0)] = 1.0
+        return codes, ((numeric - self.center) / self.scale).astype("float32")
+
+    # Adds products to the index, replacing any that are already in it
+    def add(self, assets):
+        features = product_features(assets)
+        curves = retention_curves(assets).reindex(features.index).to_numpy(dtype="float32")
+        codes, numeric = self._encode(features)
+        ids = features.index.to_numpy(dtype=object)
+
+        position = {product_id: i for i, product_id in enumerate(self.ids)}
+        existing = np.array([product_id in position for product_id in ids], dtype=bool)
+        if existing.any():
+            rows = [position[product_id] for product_id in ids[existing]]
+            self.codes[rows] = codes[existing]
+            self.numeric[rows] = numeric[existing]
+            self.curves[rows] = curves[existing]
+            self.names[rows] = features["Product_Name_x"].to_numpy(dtype=object)[existing]
+
+        new = ~existing
+        self.ids = np.concatenate([self.ids, ids[new]])
+        self.names = np.concatenate([self.names, features["Product_Name_x"].to_numpy(dtype=object)[new]])
+        self.codes = np.vstack([self.codes, codes[new]])
+        self.numeric = np.vstack([self.numeric, numeric[new]])
+        self.curves = np.vstack([self.curves, curves[new]])
+        return self
+
+    def remove(self, product_ids):
+        keep = ~np.isin(self.ids, list(product_ids))
+        self.ids, self.names = self.ids[keep], self.names[keep]
+        self.codes, self.numeric, self.curves = self.codes[keep], self.numeric[keep], self.curves[keep]
+        return self
+
+    # The k established products closest to the product in `rows` (its records in
+    # the data, one or two months are enough)
+    def query(self, rows, k=5):
+        features = product_features(rows).iloc[:1]
+        codes, numeric = self._encode(features)
+        diff = self.numeric - numeric[0]
+        squared = np.where(np.isnan(diff), MISSING_PENALTY, diff * diff)
+        distance = (self.codes != codes[0]) @ self.cat_weights + squared @ self.num_weights
+        distance = np.sqrt(distance)
+        distance[self.ids == features.index[0]] = np.inf
+
+        k = min(k, len(self))
+        nearest = np.argpartition(distance, k - 1)[:k]
+        nearest = nearest[np.argsort(distance[nearest])]
+        return pd.DataFrame({
+            "Product_ID": self.ids[nearest],
+            "Product_Name_x": self.names[nearest],
+            "Distance": distance[nearest],
+            "Row": nearest,
+        })
+
+    # Inverse-distance weighted average of the neighbours' retention curves,
+    # scaled to launch_price when given
+    def blended_curve(self, neighbours, launch_price=None):
+        curves = self.curves[neighbours["Row"].to_numpy()]
+        weights = 1.0 / (neighbours["Distance"].to_numpy()[:, None] + 1e-3)
+        weights = np.where(np.isnan(curves), 0.0, weights)
+        with np.errstate(invalid="ignore"):
+            blended = (np.nan_to_num(curves) * weights).sum(axis=0) / weights.sum(axis=0)
+        curve = pd.DataFrame({
+            "Months_Since_Release": np.arange(CURVE_MONTHS),
+            "Retention_%": 100 * blended,
+            "Neighbours": (weights > 0).sum(axis=0),
+        }).dropna()
+        if launch_price is not None:
+            curve["Predicted_Price"] = launch_price * curve["Retention_%"] / 100
+        return curve
@@ -0,0 +1,74 @@
+import pandas as pd
+
+from depreciation import agreement_matrix, agreement_names
+
+
+# Standard grade mixes (A, B, C, D) quoted without any live computation
+GRADE_MIX_PRESETS = {
+    "Balanced": (0.25, 0.25, 0.25, 0.25),
+    "Mostly A/B": (0.40, 0.30, 0.20, 0.10),
+    "Mostly C/D": (0.10, 0.20, 0.30, 0.40),
+    "Premium": (0.60, 0.25, 0.10, 0.05),
+}
+
+# Billing agreement names by the residual column they are priced with
+AGREEMENTS = agreement_names()
+
+
+# (agreement,) factor row for every preset, in AGREEMENTS order
+def factor_matrix(presets=GRADE_MIX_PRESETS):
+    return agreement_matrix(list(presets.values()))
+
+
+# Each record's price as a percent of the product's first observed price,
+# indexed by (Product_ID, Months_Since_Release)
+def price_ratios(assets):
+    df = assets.sort_values(["Product_ID", "Date"])
+    products = df.groupby("Product_ID", sort=False)
+    period = df["Year"] * 12 + df["Month"]
+    months = period - products["Year"].transform("first") * 12 - products["Month"].transform("first")
+    ratio = 100 * df["Current_Month_Price"] / products["Current_Month_Price"].transform("first")
+    return pd.Series(ratio.to_numpy(), index=pd.MultiIndex.from_arrays(
+        [df["Product_ID"].to_numpy(), months.to_numpy()], names=["Product_ID", "Months_Since_Release"]
+    ))
+
+
+# Residual percent for every (Product_ID, Months_Since_Release) row and every
+# (preset, agreement) column, materialized as one float32 block sorted by key
+class QuoteTable:
+    def __init__(self, assets, presets=GRADE_MIX_PRESETS):
+        self.presets = presets
+        self.columns = pd.MultiIndex.from_product([list(presets), list(AGREEMENTS.values())], names=["Preset", "Agreement"])
+        self.ratios, self.table = self._materialize(assets)
+
+    def _materialize(self, assets):
+        ratios = price_ratios(assets).sort_index()
+        values = (ratios.to_numpy()[:, None] * factor_matrix(self.presets).ravel()[None, :]).astype("float32")
+        return ratios, pd.DataFrame(values, index=ratios.index, columns=self.columns)
+
+    def __len__(self):
+        return len(self.table)
+
+    # Recomputes only the given products, e.g. after a data refresh touched them
+    def refresh(self, assets, product_ids):
+        product_ids = list(product_ids)
+        kept = ~self.ratios.index.get_level_values("Product_ID").isin(product_ids)
+        ratios, table = self.ratios[kept], self.table[kept]
+        changed = assets[assets["Product_ID"].isin(product_ids)]
+        if not changed.empty:
+            new_ratios, new_table = self._materialize(changed)
+            ratios = pd.concat([ratios, new_ratios]).sort_index()
+            table = pd.concat([table, new_table]).sort_index()
+        self.ratios, self.table = ratios, table
+        return self
+
+    # Residual percent by agreement name for one product month. Presets are a keyed
+    # lookup; any other grade mix is computed live from the stored price ratio.
+    def quote(self, product_id, months, preset="Balanced", weights=None):
+        row = self.table.index.get_loc((product_id, months))
+        if weights is None:
+            start = list(self.presets).index(preset) * len(AGREEMENTS)
+            values = self.table.to_numpy()[row, start:start + len(AGREEMENTS)]
+        else:
+            values = self.ratios.to_numpy()[row] * agreement_matrix([weights])[0]
+        return dict(zip(AGREEMENTS.values(), values.tolist()))
@@ -0,0 +1,20 @@
+from datetime import datetime
+
+import streamlit as st
+
+from data_source import SCHEMA_VERSION
+from depreciation import AGREEMENT_DEFINITIONS, compute_scenarios
+from disk_cache import cached, content_key
+
+
+# Process-wide scenario results shared by every session and the warm-up worker.
+# rows_key is a digest of the selected records, so any selection that narrows down
+# to the same records reuses the same entry, across data versions when those
+# records did not change. The key also carries SCHEMA_VERSION and the agreement
+# definitions, so a deploy that changes how scenarios are priced never serves
+# stale frames from the shared disk cache.
+@st.cache_data(max_entries=1000, show_spinner=False)
+def scenario_results(rows_key, orig_price, release_date_str, weights, _rows):
+    release_date = datetime.strptime(release_date_str, "%Y-%m")
+    key = content_key("scenarios", SCHEMA_VERSION, AGREEMENT_DEFINITIONS, rows_key, orig_price, release_date_str, weights)
+    return cached(key, lambda: compute_scenarios(_rows, orig_price, release_date, weights))
@@ -0,0 +1,79 @@
+import re
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+
+# Columns that place an entry in the sidebar cascade
+ENTRY_COLUMNS = ["Main_Group", "Group_Name_x", "Brand_x", "Product_Name_x", "Year_Available"]
+# Searchable text per entry and the weight of a match in each
+TOKEN_FIELDS = {"Product_Name_x": 3.0, "Brand_x": 2.0, "Group_Name_x": 1.0, "Gen": 1.0, "Class": 1.0, "Screen_Size": 0.5, "Storage": 0.5}
+
+_TOKEN = re.compile(r"[0-9a-z]+(?:\.[0-9]+)?")
+
+
+def tokenize(text):
+    return _TOKEN.findall(str(text).lower())
+
+
+def _field_text(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return "" if pd.isna(value) else str(value)
+
+
+# Inverted index from token to catalog entries, with a sorted token list so a
+# partially typed word resolves to a contiguous range of tokens.
+class SearchIndex:
+    def __init__(self, assets):
+        assets = assets.dropna(subset=ENTRY_COLUMNS)
+        grouped = assets.groupby(ENTRY_COLUMNS, sort=False)
+        self.entries = grouped.size().rename("Records").reset_index()
+        specs = grouped[[col for col in TOKEN_FIELDS if col not in ENTRY_COLUMNS]].agg(lambda s: " ".join(map(_field_text, s.unique())))
+        fields = pd.concat([self.entries.set_index(ENTRY_COLUMNS), specs], axis=1).reset_index()
+
+        postings = {}
+        for field, weight in TOKEN_FIELDS.items():
+            for entry, text in enumerate(fields[field].map(_field_text)):
+                for token in set(tokenize(text)):
+                    scores = postings.setdefault(token, {})
+                    scores[entry] = max(scores.get(entry, 0.0), weight)
+
+        self.tokens = sorted(postings)
+        self.postings = [
+            (np.fromiter(postings[token], dtype="int64"), np.fromiter(postings[token].values(), dtype="float64"))
+            for token in self.tokens
+        ]
+        # Popular entries (long history) win ties
+        self.popularity = np.log1p(self.entries["Records"].to_numpy()) / 100
+        self.names = self.entries["Product_Name_x"].str.lower().to_numpy(dtype=str)
+
+    # Score per entry for one query token: full weight for an exact token,
+    # half for a prefix of a longer one
+    def _token_scores(self, token):
+        scores = np.zeros(len(self.entries))
+        start = bisect_left(self.tokens, token)
+        for i in range(start, len(self.tokens)):
+            if not self.tokens[i].startswith(token):
+                break
+            entries, weights = self.postings[i]
+            factor = 1.0 if self.tokens[i] == token else 0.5
+            np.maximum.at(scores, entries, weights * factor)
+        return scores
+
+    # Best matching entries; every query word has to match (as a word or prefix)
+    def search(self, query, limit=20):
+        tokens = tokenize(query)
+        if not tokens:
+            return self.entries.iloc[:0]
+        total = np.zeros(len(self.entries))
+        for token in tokens:
+            scores = self._token_scores(token)
+            total = np.where(scores > 0, total + scores, -np.inf)
+        total += self.popularity
+        total[np.char.startswith(self.names, query.strip().lower())] += 1.0
+
+        matches = np.flatnonzero(np.isfinite(total) & (total > 0))
+        top = matches[np.argsort(-total[matches], kind="stable")[:limit]]
+        return self.entries.iloc[top].assign(Score=total[top])
@@ -0,0 +1,72 @@
+import random
+
+import pandas as pd
+
+from depreciation import AGREEMENT_DEFINITIONS, GRADE_FACTORS, add_scenarios, agreement_matrix, scenario_labels
+
+
+# The hand-written scalar pricing the agreement definitions replaced. Any edit to
+# AGREEMENT_DEFINITIONS that changes an existing agreement's price fails here.
+def reference_factors(weights):
+    total_weight = sum(weights)
+    a, b, c, d = [w / total_weight for w in weights]
+    a_factor, b_factor, c_factor, d_factor = (GRADE_FACTORS[g] for g in "ABCD")
+
+    factors = {}
+    factors["Expected_Residual"] = a * a_factor + b * b_factor + c * c_factor + d * d_factor
+
+    a_b, b_b, c_b, d_b = a + 0.1, b + 0.05, max(c - 0.075, 0), max(d - 0.075, 0)
+    total_b = a_b + b_b + c_b + d_b
+    factors["Best_Case"] = (a_b * a_factor + b_b * b_factor + c_b * c_factor + d_b * d_factor) / total_b
+
+    a_w, b_w, c_w, d_w = max(a - 0.075, 0), max(b - 0.075, 0), c + 0.05, d + 0.1
+    total_w = a_w + b_w + c_w + d_w
+    factors["Worst_Case"] = (a_w * a_factor + b_w * b_factor + c_w * c_factor + d_w * d_factor) / total_w
+
+    c_d_total = c + d
+    c_adj = c / c_d_total if c_d_total > 0 else 0
+    d_adj = d / c_d_total if c_d_total > 0 else 0
+    factors["Medium_Damage_Billing"] = c_adj * c_factor + d_adj * d_factor
+
+    factors["No_Damage_Billing"] = factors["Expected_Residual"] * 0.85
+    factors["D_Only_Billing"] = a + b + c
+    return factors
+
+
+def weight_mixes(n=2000, seed=0):
+    rng = random.Random(seed)
+    mixes = [(0.25, 0.25, 0.25, 0.25), (1, 0, 0, 0), (0, 0, 0, 1), (1, 1, 0, 0), (0, 0, 1, 1)]
+    while len(mixes) < n:
+        mix = tuple(rng.choice([0.0, rng.random()]) for _ in range(4))
+        if sum(mix) > 0:
+            mixes.append(mix)
+    return mixes
+
+
+def test_agreements_match_reference():
+    mixes = weight_mixes()
+    matrix = agreement_matrix(mixes)
+    for row, weights in zip(matrix, mixes):
+        expected = reference_factors(weights)
+        actual = dict(zip(AGREEMENT_DEFINITIONS, row))
+        for key, value in expected.items():
+            assert abs(actual[key] - value) < 1e-12, (weights, key, actual[key], value)
+
+
+def test_new_agreement_is_one_entry():
+    AGREEMENT_DEFINITIONS["Partial"] = {"name": "Partial", "plot": "Partial", "scale": 0.5}
+    try:
+        df = add_scenarios(pd.DataFrame({"Current_Month_Price": [1000.0], "Original_Price": 2000.0}), (1, 1, 1, 1))
+        assert scenario_labels(field="plot")["Partial_%"] == "Partial"
+        assert "Partial_%" not in scenario_labels()
+    finally:
+        del AGREEMENT_DEFINITIONS["Partial"]
+    factor = reference_factors((1, 1, 1, 1))["Expected_Residual"] * 0.5
+    assert abs(df["Partial"].iloc[0] - 1000 * factor) < 1e-9
+    assert abs(df["Partial_%"].iloc[0] - 50 * factor) < 1e-9
+
+
+if __name__ == "__main__":
+    test_agreements_match_reference()
+    test_new_agreement_is_one_entry()
+    print("Agreement pricing matches the reference")
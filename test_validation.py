@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from validation import REASONS, validate, validation_summary
+
+
+def clean_row(product_id=1, year=2024, month=1, price=1000.0):
+    return {
+        "Product_ID": product_id, "Product_Name_x": "ThinkPad T14", "Brand_x": "ThinkPad",
+        "Group_Name_x": "Laptop", "Year_Available": 2022, "Month": month, "Year": year,
+        "Current_Month_Price": price, "Main_Group": "Computers",
+    }
+
+
+# One clean row plus one row failing each reason code, in REASONS order
+def catalog():
+    rows = [
+        clean_row(),
+        clean_row(product_id=np.nan),
+        clean_row(price=np.nan),
+        clean_row(price=0.0),
+        clean_row(year=1999),
+        clean_row(month=13),
+        clean_row(),
+        dict(clean_row(), Brand_x=np.nan),
+    ]
+    return pd.DataFrame(rows)
+
+
+def test_clean_catalog_has_empty_summary():
+    clean, quarantine = validate(catalog().iloc[:1])
+    summary = validation_summary(clean, quarantine)
+    assert len(clean) == 1 and quarantine.empty
+    assert list(summary.index) == list(REASONS)
+    assert (summary["Rows"] == 0).all() and (summary["Products"] == 0).all()
+
+
+def test_one_row_per_reason():
+    clean, quarantine = validate(catalog())
+    assert len(clean) == 1
+    assert list(quarantine["Reasons"]) == list(REASONS)
+    summary = validation_summary(clean, quarantine)
+    assert (summary["Rows"] == 1).all()
+    assert summary.loc["DUPLICATE_PERIOD", "Products"] == 1
+    assert summary.loc["MISSING_PRODUCT_ID", "Products"] == 0
+
+
+if __name__ == "__main__":
+    test_clean_catalog_has_empty_summary()
+    test_one_row_per_reason()
+    print("Validation checks pass")
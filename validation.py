@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+
+# Reason codes attached to quarantined rows
+REASONS = {
+    "MISSING_PRODUCT_ID": "Product_ID is missing",
+    "MISSING_PRICE": "Current_Month_Price is missing",
+    "NON_POSITIVE_PRICE": "Current_Month_Price is zero or negative",
+    "INVALID_YEAR": "Year is missing, fractional or outside 2000-2100",
+    "INVALID_MONTH": "Month is missing, fractional or outside 1-12",
+    "DUPLICATE_PERIOD": "Repeats an earlier valid (Product_ID, Year, Month) record",
+    "MISSING_SPEC": "Product_Name_x, Brand_x, Group_Name_x or Year_Available is missing",
+}
+
+SPEC_COLUMNS = ["Product_Name_x", "Brand_x", "Group_Name_x", "Year_Available"]
+
+
+def _whole(values, low, high):
+    return values.notna() & (values % 1 == 0) & values.between(low, high)
+
+
+# Boolean frame with one column per reason code. Duplicates are only looked for
+# among rows that pass every other check, so an invalid first copy of a month
+# does not take a valid later copy down with it.
+def check_rows(df):
+    price = pd.to_numeric(df["Current_Month_Price"], errors="coerce")
+    year = pd.to_numeric(df["Year"], errors="coerce")
+    month = pd.to_numeric(df["Month"], errors="coerce")
+    checks = pd.DataFrame({
+        "MISSING_PRODUCT_ID": df["Product_ID"].isna(),
+        "MISSING_PRICE": price.isna(),
+        "NON_POSITIVE_PRICE": price <= 0,
+        "INVALID_YEAR": ~_whole(year, 2000, 2100),
+        "INVALID_MONTH": ~_whole(month, 1, 12),
+        "MISSING_SPEC": df[SPEC_COLUMNS].isna().any(axis=1),
+    }, index=df.index)
+    valid = ~checks.any(axis=1)
+    checks["DUPLICATE_PERIOD"] = df[valid].duplicated(["Product_ID", "Year", "Month"], keep="first").reindex(df.index, fill_value=False)
+    return checks[list(REASONS)]
+
+
+# Splits rows into (clean, quarantine). Clean rows get their Date, so later
+# steps can use it without re-parsing; quarantined rows get a "Reasons" column.
+def validate(df):
+    checks = check_rows(df)
+    bad = checks.any(axis=1).to_numpy()
+
+    clean = df[~bad].copy()
+    clean["Year"] = clean["Year"].astype("int64")
+    clean["Month"] = clean["Month"].astype("int64")
+    clean["Date"] = pd.to_datetime(clean[["Year", "Month"]].assign(DAY=1))
+
+    quarantine = df[bad].copy()
+    flags = checks[bad].to_numpy()
+    codes = np.array(list(REASONS), dtype=object)
+    quarantine["Reasons"] = pd.Series([";".join(codes[row]) for row in flags], index=quarantine.index, dtype=object)
+    return clean, quarantine
+
+
+# Rows and products affected per reason code
+def validation_summary(clean, quarantine):
+    total = len(clean) + len(quarantine)
+    reasons = quarantine["Reasons"].str.split(";").explode()
+    summary = pd.DataFrame({
+        "Rows": reasons.value_counts(),
+        "Products": quarantine.loc[reasons.index, "Product_ID"].groupby(reasons.to_numpy()).nunique(),
+    }).reindex(list(REASONS)).fillna(0).astype("int64")
+    summary["Share_%"] = 100 * summary["Rows"] / max(total, 1)
+    summary["Description"] = [REASONS[code] for code in summary.index]
+    return summary
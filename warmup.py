@@ -0,0 +1,79 @@
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from results_cache import scenario_results
+
+
+# Inputs the app opens with; warmed results are stored under these
+DEFAULT_INPUTS = (10000.0, "2021-01", (0.25, 0.25, 0.25, 0.25))
+DEFAULT_YEARS = (2019, 2025)
+
+# Products to always warm, separated by ";" (Product_Name_x values)
+WARMUP_PRODUCTS = [p for p in os.environ.get("WARMUP_PRODUCTS", "").split(";") if p]
+WARMUP_TOP_N = int(os.environ.get("WARMUP_TOP_N", "25"))
+# Kept small so warm-up never competes with interactive sessions for long
+WARMUP_WORKERS = int(os.environ.get("WARMUP_WORKERS", "2"))
+WARMUP_PAUSE = float(os.environ.get("WARMUP_PAUSE", "0.05"))
+
+_executor = None
+
+
+# How often each product was requested in this process
+@st.cache_resource
+def request_counts():
+    return Counter()
+
+
+def record_request(product):
+    if product:
+        request_counts()[product] += 1
+
+
+# Configured products first, then the most requested ones, then the ones with the
+# longest history until top_n is reached
+def popular_products(assets, top_n=WARMUP_TOP_N):
+    known = set(assets["Product_Name_x"].dropna().unique())
+    products = [p for p in WARMUP_PRODUCTS if p in known]
+    products += [p for p, _ in request_counts().most_common() if p in known]
+    products += list(assets["Product_Name_x"].value_counts().index)
+    return list(dict.fromkeys(products))[:top_n]
+
+
+# Rows the sidebar selects for a product with its default year range and no spec
+# filters, one selection per Main Group and brand it is listed under
+def default_rows(assets, product):
+    start_year, end_year = DEFAULT_YEARS
+    rows = assets[(assets["Product_Name_x"] == product) & assets["Year_Available"].between(start_year, end_year)]
+    return [group.index for _, group in rows.groupby(["Main_Group", "Brand_x"])]
+
+
+def warm_product(snapshot, product, pause=WARMUP_PAUSE):
+    orig_price, release_date_str, weights = DEFAULT_INPUTS
+    for row_ids in default_rows(snapshot.assets, product):
+        scenario_results(snapshot.rows_key(row_ids), orig_price, release_date_str, weights, snapshot.assets.loc[row_ids])
+    time.sleep(pause)
+
+
+# Popular products a data refresh changed, warmed before the new version goes live;
+# the others keep their cached results
+def warm_changed(snapshot):
+    changed = set(snapshot.assets.loc[snapshot.assets["Product_ID"].isin(snapshot.changes.changed), "Product_Name_x"])
+    for product in popular_products(snapshot.assets):
+        if product in changed:
+            warm_product(snapshot, product, pause=0)
+
+
+# Started once per data version; a new version cancels whatever is still queued
+# for the old one. Runs in the background while the app serves requests.
+@st.cache_resource(max_entries=1)
+def start_warmup(version, _snapshot):
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+
+    _executor = ThreadPoolExecutor(max_workers=WARMUP_WORKERS, thread_name_prefix="warmup")
+    return [_executor.submit(warm_product, _snapshot, product) for product in popular_products(_snapshot.assets)]